@@ -9,24 +9,35 @@ Zweck:
 - Tags: alle aus B, plus alle mx-* aus A (A überschreibt B)
 - Keys lowercase (Mutagen/Projektwahrheit)
 - touch_comment_tag am Ende anwenden
-- Serielle Verarbeitung, harter Abbruch bei Nutzerfehlern
+- Merge primär in Python: A kopieren, Tags/Cover via Mutagen, Cover-Crop via Pillow (JPEG)
+- Fallback ffmpeg (Thread-Pool, je Batch von bis zu 64 Paaren ein ffmpeg-Subprozess
+  mit mehreren Outputs; bei Fehler Einzelaufrufe je Paar), harter Abbruch beim ersten Fehler
 - Log: ./abmerge-<timestamp>.log
-- CLI: abmerge [--verbose]  (keine weiteren Optionen)
+- CLI: abmerge [--verbose] [--serial]  (--serial: seriell, zum Debuggen)
 """
 
 from __future__ import annotations
 
 import argparse
+import io
+import math
 import os
 import shutil
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from mutagen.flac import FLAC, Picture
 
 # --- Projekt-Libs (werfen früh, wenn ffmpeg/ffprobe fehlen) ---
 from lib import config
-from lib.utils import find_audio_files, get_timestamp, make_filename
+from lib.utils import get_timestamp, make_filename
 from lib import flac as flaclib
 
 # Exit-Codes (siehe Spezifikation)
@@ -41,16 +52,34 @@ A_DIRNAME = "A-Ordner"
 B_DIRNAME = "B-Ordner"
 C_DIRNAME = "C-Ordner"
 MX_HASH_KEY = "mx-hash"
+BATCH_MAX = 64  # max. Paare pro ffmpeg-Aufruf
+
+# Cover-Filter (beidmittig quadratisch croppen, dann 600×600) und Platzhalter – einmal je Prozess
+_VF_CROP_SCALE = "crop='min(iw,ih)':'min(iw,ih)':'(iw-min(iw,ih))/2':'(ih-min(iw,ih))/2',scale=600:600"
+_VF_SCALE_ONLY = "scale=600:600"
+_PLACEHOLDER = Path(config.EMPTY_COVER)
+COVER_SIZE = 600
 
 # --- Logging-Helfer ---------------------------------------------------------
 
 
 class DualLogger:
+    """
+    Konsole + Logdatei. Die Datei ist gepuffert (64 KB) und wird nur bei
+    status() und close() geflusht – detail()-Zeilen können bis dahin nachhängen.
+    """
+
     def __init__(self, logfile: Path, verbose_console: bool = False):
         self.logfile = logfile
         self.verbose_console = verbose_console
         self.logfile.parent.mkdir(parents=True, exist_ok=True)
-        self._fh = open(self.logfile, "a", encoding="utf-8", newline="\n")
+        self._fh = open(self.logfile, "a", encoding="utf-8",
+                        newline="\n", buffering=1 << 16)
+        # Worker-Threads loggen parallel -> Zeilen nicht verschränken
+        self._lock = threading.Lock()
+        # Zeitstempel nur einmal pro Sekunde formatieren
+        self._last_sec = -1
+        self._last_ts = ""
 
     def close(self):
         try:
@@ -59,16 +88,20 @@ class DualLogger:
             pass
 
     def _write(self, line: str, console: bool):
-        ts = get_timestamp()
-        line_ts = f"[{ts}] {line}"
-        self._fh.write(line_ts + "\n")
-        self._fh.flush()
-        if console:
-            print(line, flush=True)
+        sec = int(time.time())
+        with self._lock:
+            if sec != self._last_sec:
+                self._last_sec = sec
+                self._last_ts = get_timestamp()
+            self._fh.write(f"[{self._last_ts}] {line}\n")
+            if console:
+                print(line, flush=True)
 
     def status(self, line: str):
         # Immer auf Konsole + Log
         self._write(line, console=True)
+        with self._lock:
+            self._fh.flush()
 
     def detail(self, line: str):
         # Immer ins Log; auf Konsole nur bei --verbose
@@ -77,6 +110,14 @@ class DualLogger:
 
 # --- Hilfsfunktionen --------------------------------------------------------
 
+class MergeError(Exception):
+    """Fehler bei der Verarbeitung eines Paares; trägt den Exit-Code für fail()."""
+
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+
+
 def fail(logger: DualLogger, code: int, msg: str) -> None:
     logger.status(f"[ERR] {msg}")
     logger.close()
@@ -100,31 +141,73 @@ def check_preconditions(logger: DualLogger, cwd: Path) -> Tuple[Path, Path, Path
     return a_dir, b_dir, c_dir
 
 
-def discover_flacs(root: Path) -> List[Path]:
-    """Relativpfade der .flac-Dateien unterhalb von root (Snapshot)."""
-    return [Path(p) for p in find_audio_files(root, absolute=False, filter_ext=[".flac"])]
-
-
-def read_mx_hash(file_path: Path) -> str | None:
-    """Liest mx-hash (lowercase) als Einzelwert; None, wenn nicht vorhanden."""
+def discover_flacs(root: Path, _rel: str = "") -> Iterator[str]:
+    """
+    Relativpfade (str) der .flac-Dateien unterhalb von root, als Generator via os.scandir
+    (DirEntry-Typinfo statt extra stat; Verzeichnis-Symlinks werden wie bei os.walk nicht verfolgt).
+    """
+    with os.scandir(os.path.join(root, _rel)) as it:
+        for entry in it:
+            rel = os.path.join(_rel, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                yield from discover_flacs(root, rel)
+            elif entry.name.lower().endswith(".flac") and entry.is_file():
+                yield rel
+
+
+@dataclass
+class FlacMeta:
+    """Ergebnis des Vorab-Scans einer FLAC-Datei (ein Mutagen-Load pro Datei)."""
+    mx_hash: str | None
+    cover_idx: int | None  # Video-Stream-Index (-map N:v:<idx>) oder None
+    mx_tags: Dict[str, str] = field(default_factory=dict)
+    tags: Dict[str, List[str]] = field(default_factory=dict)  # alle Tags, Keys lowercase
+
+
+def scan_flac(file_path: Path) -> FlacMeta:
+    """Liest mx-* (lowercase, erster Wert, getrimmt, leere verworfen) und Cover-Info in einem Durchgang."""
     try:
-        val = flaclib.get_tags(file_path, MX_HASH_KEY)
-        if val is None:
-            return None
-        s = str(val).strip()
-        return s if s else None
+        audio = FLAC(str(file_path))
     except Exception:
-        return None
+        return FlacMeta(mx_hash=None, cover_idx=None)
+
+    tags = {k.lower(): v for k, v in dict(audio).items()}
+    mx_tags: Dict[str, str] = {}
+    for kl, v in tags.items():
+        if not kl.startswith("mx-") or not v or v[0] is None:
+            continue
+        val = str(v[0]).strip()
+        if val:
+            mx_tags[kl] = val
+
+    return FlacMeta(
+        mx_hash=mx_tags.get(MX_HASH_KEY),
+        cover_idx=flaclib.first_picture_index(audio),
+        mx_tags=mx_tags,
+        tags=tags,
+    )
+
+
+def scan_flacs(root: Path, rels: Iterable[str]) -> Dict[Path, FlacMeta]:
+    """
+    scan_flac für alle Relativpfade unter root (parallel; I/O-lastig).
+    rels darf ein Generator sein: Scans starten, während die Discovery noch läuft.
+    """
+    def scan(rel: str) -> Tuple[Path, FlacMeta]:
+        return Path(rel), scan_flac(os.path.join(root, rel))
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        return dict(pool.map(scan, rels))
 
 
 def pair_by_hash(
-    a_root: Path, b_root: Path, a_files: List[Path], b_files: List[Path]
+    a_meta: Dict[Path, FlacMeta], b_meta: Dict[Path, FlacMeta]
 ) -> List[Tuple[str, Path, Path]]:
     """Erzeugt Liste (hash, a_rel, b_rel); validiert 1:1, sortiert nach b_rel. Hartabbruch bei Verstoß."""
     # A: hash -> a_rel
     a_map: Dict[str, Path] = {}
-    for rel in a_files:
-        h = read_mx_hash(a_root / rel)
+    for rel, meta in a_meta.items():
+        h = meta.mx_hash
         if not h:
             raise ValueError(
                 f"fehlender oder leerer {MX_HASH_KEY} in A: {rel}")
@@ -135,8 +218,8 @@ def pair_by_hash(
 
     # B: hash -> b_rel
     b_map: Dict[str, Path] = {}
-    for rel in b_files:
-        h = read_mx_hash(b_root / rel)
+    for rel, meta in b_meta.items():
+        h = meta.mx_hash
         if not h:
             raise ValueError(
                 f"fehlender oder leerer {MX_HASH_KEY} in B: {rel}")
@@ -146,192 +229,256 @@ def pair_by_hash(
         b_map[h] = rel
 
     # 1:1 Validierung
-    if set(a_map.keys()) != set(b_map.keys()):
-        missing_in_b = sorted(set(a_map.keys()) - set(b_map.keys()))
-        missing_in_a = sorted(set(b_map.keys()) - set(a_map.keys()))
+    if a_map.keys() != b_map.keys():  # Set-Vergleich der Views, ohne Kopien
+        # nur Anzahlen werden gemeldet -> Differenz der Views zählen, nichts sortieren
+        missing_in_b = len(a_map.keys() - b_map.keys())
+        missing_in_a = len(b_map.keys() - a_map.keys())
         parts = []
         if missing_in_b:
-            parts.append(f"{len(missing_in_b)} Hash(es) ohne Pendant in B")
+            parts.append(f"{missing_in_b} Hash(es) ohne Pendant in B")
         if missing_in_a:
-            parts.append(f"{len(missing_in_a)} Hash(es) ohne Pendant in A")
+            parts.append(f"{missing_in_a} Hash(es) ohne Pendant in A")
         raise ValueError("1:1-Paarbildung verletzt: " +
                          "; ".join(parts) if parts else "unbekannter Fehler")
 
-    pairs = [(h, a_map[h], b_map[h]) for h in b_map.keys()]
-    # stabil & deterministisch: nach Pfad in B
-    pairs.sort(key=lambda t: t[2].as_posix().lower())
+    pairs = [(h, a_map[h], b_rel) for h, b_rel in b_map.items()]
+    # stabil & deterministisch: nach Pfad in B (Schlüssel einmal je Hash)
+    b_sort_key = {h: rel.as_posix().lower() for h, rel in b_map.items()}
+    pairs.sort(key=lambda t: b_sort_key[t[0]])
     return pairs
 
 
-def build_ffmpeg_cmd(
-    a_src: Path,
-    b_src: Path,
-    c_tmp: Path,
-    a_cover_idx: int | None,
-    b_cover_idx: int | None,
-    placeholder_path: Path,
-) -> list[str]:
-    """
-    Input 0: A  (Audio immer von hier; evtl. Cover-Fallback)
-    Input 1: B  (Tags IMMER von hier; evtl. Cover)
-    Input 2: Platzhalter  (nur wenn weder B noch A ein Cover hat)
-    """
-    cmd: list[str] = ["ffmpeg", "-v", "error"]
+@dataclass
+class PairJob:
+    """Ein zu mergendes Paar inkl. Zielpfaden und Vorab-Scan beider Quellen."""
+    h: str
+    a_rel: Path
+    b_rel: Path
+    a_src: Path
+    b_src: Path
+    c_target: Path
+    c_tmp: Path
+    a_meta: FlacMeta
+    b_meta: FlacMeta
+    via_mutagen: bool = False  # True: Tags inkl. mx-* bereits in Python geschrieben
 
-    # Inputs
-    cmd += ["-i", str(a_src)]  # 0 = A
-    cmd += ["-i", str(b_src)]  # 1 = B
-    use_placeholder = (b_cover_idx is None and a_cover_idx is None)
-    if use_placeholder:
-        cmd += ["-i", str(placeholder_path)]  # 2 = Platzhalter
 
-    # Audio aus A (copy)
-    cmd += ["-map", "0:a:0", "-c:a", "copy"]
+def prepare_pair(
+    a_root: Path,
+    b_root: Path,
+    c_root: Path,
+    h: str,
+    a_rel: Path,
+    b_rel: Path,
+    a_meta: FlacMeta,
+    b_meta: FlacMeta,
+) -> PairJob:
+    """Legt den Zielordner an und prüft, dass das Ziel noch nicht existiert."""
+    c_target = c_root / b_rel
+    c_target.parent.mkdir(parents=True, exist_ok=True)
 
-    # Cover-Pfadwahl: zuerst B, dann A, sonst Platzhalter
-    if b_cover_idx is not None:
-        cmd += ["-map", f"1:{b_cover_idx}"]
-        vf = "crop='min(iw,ih)':'min(iw,ih)':'(iw-min(iw,ih))/2':'(ih-min(iw,ih))/2',scale=600:600"
-    elif a_cover_idx is not None:
-        cmd += ["-map", f"0:{a_cover_idx}"]
-        vf = "crop='min(iw,ih)':'min(iw,ih)':'(iw-min(iw,ih))/2':'(ih-min(iw,ih))/2',scale=600:600"
-    else:
-        cmd += ["-map", "2:v:0"]
-        vf = "scale=600:600"
+    if c_target.exists():
+        raise MergeError(EXIT_IO, f"target exists bereits: {c_target}")
+
+    return PairJob(
+        h=h,
+        a_rel=a_rel,
+        b_rel=b_rel,
+        a_src=a_root / a_rel,
+        b_src=b_root / b_rel,
+        c_target=c_target,
+        # Temp-Datei (atomar)
+        c_tmp=c_target.with_suffix(c_target.suffix + ".partial"),
+        a_meta=a_meta,
+        b_meta=b_meta,
+    )
 
-    cmd += ["-vf", vf, "-c:v", "mjpeg", "-disposition:v:0", "attached_pic"]
-    cmd += ["-metadata:s:v:0", "title=Front Cover"]
-    cmd += ["-metadata:s:v:0", "comment=Cover (front)"]
 
-    # Tags IMMER aus B
-    cmd += ["-map_metadata", "1"]
+def build_ffmpeg_cmd(jobs: List[PairJob]) -> list[str]:
+    """
+    Ein ffmpeg-Aufruf für ein oder mehrere Paare (je Paar ein Output-Block).
+
+    Input 2i:   A  (Audio immer von hier; evtl. Cover-Fallback)
+    Input 2i+1: B  (Tags IMMER von hier; evtl. Cover)
+    Input 2n:   Platzhalter  (einmal, nur wenn ein Paar weder in B noch A ein Cover hat)
+
+    Cover-Indizes sind relativ zu den Video-Streams der Quelle (-map N:v:<idx>).
+    Output-Optionen (-map, -vf, -metadata, -map_metadata) gelten jeweils nur
+    für die unmittelbar folgende Ausgabedatei.
+    """
+    # -nostdin: kein Lesen vom Terminal (hängt sonst im Hintergrundbetrieb)
+    cmd: list[str] = ["ffmpeg", "-nostdin", "-v", "error"]
 
-    # FLAC-Muxer explizit (wegen .partial)
-    cmd += ["-f", "flac", "-y", str(c_tmp)]
+    # Inputs
+    for job in jobs:
+        cmd.extend(("-i", str(job.a_src),   # 2i = A
+                    "-i", str(job.b_src)))  # 2i+1 = B
+    ph_in = 2 * len(jobs)
+    if any(j.a_meta.cover_idx is None and j.b_meta.cover_idx is None for j in jobs):
+        cmd.extend(("-i", str(_PLACEHOLDER)))  # 2n = Platzhalter
+
+    for i, job in enumerate(jobs):
+        a_in, b_in = 2 * i, 2 * i + 1
+
+        # Audio aus A (copy)
+        cmd.extend(("-map", f"{a_in}:a:0", "-c:a", "copy"))
+
+        # Cover-Pfadwahl: zuerst B, dann A, sonst Platzhalter
+        if job.b_meta.cover_idx is not None:
+            v_map, vf = f"{b_in}:v:{job.b_meta.cover_idx}", _VF_CROP_SCALE
+        elif job.a_meta.cover_idx is not None:
+            v_map, vf = f"{a_in}:v:{job.a_meta.cover_idx}", _VF_CROP_SCALE
+        else:
+            v_map, vf = f"{ph_in}:v:0", _VF_SCALE_ONLY
+
+        cmd.extend((
+            "-map", v_map,
+            "-vf", vf, "-c:v", "mjpeg", "-disposition:v:0", "attached_pic",
+            "-metadata:s:v:0", "title=Front Cover",
+            "-metadata:s:v:0", "comment=Cover (front)",
+            # Tags IMMER aus B
+            "-map_metadata", str(b_in),
+            # FLAC-Muxer explizit (wegen .partial)
+            "-f", "flac", "-y", str(job.c_tmp),
+        ))
     return cmd
 
 
-def get_cover_index(b_src: Path) -> int | None:
+def apply_mx_tags(target: Path, mx_map: Dict[str, str]) -> int:
     """
-    Liefert den *globalen* Stream-Index des ersten embedded Covers in B
-    (wie lib.flac._first_attached_pic_index). None, wenn keins vorhanden.
+    Schreibt mx-* aus A (overwrite=True) auf target. Gibt Anzahl Keys zurück.
+    mx_map ist bereits beim Scan normalisiert (scan_flac): Keys lowercase, Werte getrimmt, nie leer.
     """
-    info = flaclib._ffprobe_json(b_src)
-    return flaclib._first_attached_pic_index(info)
-
-
-def set_mx_tags_from_a_on_target(a_src: Path, target: Path) -> int:
-    """Liest alle mx-* aus A (lowercase) und schreibt sie (overwrite=True) auf target. Gibt Anzahl Keys zurück."""
-    all_a = flaclib.get_tags(a_src)  # dict: key(lower) -> list[str]
-    if not isinstance(all_a, dict):
-        return 0
-    mx_map: Dict[str, str] = {}
-    for k, v in all_a.items():
-        if not isinstance(k, str):
-            continue
-        kl = k.lower()
-        if not kl.startswith("mx-"):
-            continue
-        if v is None:
-            continue
-        if isinstance(v, (list, tuple)):
-            if not v:
-                continue
-            val = v[0]
-        else:
-            val = v
-        if val is None:
-            continue
-        s = str(val).strip()
-        if s == "":
-            continue
-        mx_map[kl] = s
-
     if mx_map:
         flaclib.set_tags(target, mx_map, overwrite=True)
     return len(mx_map)
 
 
-def process_pair(
-    logger: DualLogger,
-    a_root: Path,
-    b_root: Path,
-    c_root: Path,
-    h: str,
-    a_rel: Path,
-    b_rel: Path,
-) -> None:
-    a_src = a_root / a_rel
-    b_src = b_root / b_rel
-    c_target = c_root / b_rel
-    c_target.parent.mkdir(parents=True, exist_ok=True)
-
-    if c_target.exists():
-        fail(logger, EXIT_IO, f"target exists bereits: {c_target}")
-
-    # Temp-Datei (atomar)
-    c_tmp = c_target.with_suffix(c_target.suffix + ".partial")
-
-    # Cover-Indices beider Quellen bestimmen
-    b_cover_idx = get_cover_index(b_src)
-    a_cover_idx = get_cover_index(a_src)
-    placeholder = Path(config.EMPTY_COVER)
-
-    # ffmpeg-Kommando bauen (Inputs: 0=A, 1=B, optional 2=Platzhalter)
-    cmd = build_ffmpeg_cmd(
-        a_src=a_src,
-        b_src=b_src,
-        c_tmp=c_tmp,
-        a_cover_idx=a_cover_idx,
-        b_cover_idx=b_cover_idx,
-        placeholder_path=placeholder,
-    )
-
-    # Fürs Log hübsch quoten
-    cmd_str = " ".join(subprocess.list2cmdline([x]) for x in cmd)
-
-    # Status + Details
-    logger.status(
-        f"[DO] hash={h}  B=\"{b_rel.as_posix()}\"  →  C=\"{(Path(C_DIRNAME) / b_rel).as_posix()}\""
-    )
-    logger.detail(f"ffmpeg: {cmd_str}")
+def _cover_jpeg(data: bytes, crop: bool) -> bytes:
+    """
+    Cover wie die ffmpeg-Filter (_VF_CROP_SCALE / _VF_SCALE_ONLY): optional
+    beidmittig quadratisch croppen, dann 600×600, als JPEG.
+    Ist die Quelle schon ein 600×600-JPEG, werden die Bytes unverändert übernommen.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as im:
+        if im.format == "JPEG" and im.size == (COVER_SIZE, COVER_SIZE):
+            return data
+        im = im.convert("RGB")
+        if crop:
+            side = min(im.size)
+            left = (im.width - side) // 2
+            top = (im.height - side) // 2
+            im = im.crop((left, top, left + side, top + side))
+        im = im.resize((COVER_SIZE, COVER_SIZE), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=90)
+        return buf.getvalue()
+
+
+def merge_via_mutagen(job: PairJob) -> None:
+    """
+    Merge ohne ffmpeg: A byteweise nach c_tmp kopieren (Audio unverändert), dann
+    in EINEM Save: Tags leeren, alle Tags aus B + mx-* aus A setzen, Cover ersetzen.
+    Cover-Wahl wie build_ffmpeg_cmd: B, sonst A, sonst Platzhalter (nur skaliert).
+    """
+    if job.b_meta.cover_idx is not None:
+        data, crop = FLAC(str(job.b_src)).pictures[job.b_meta.cover_idx].data, True
+    elif job.a_meta.cover_idx is not None:
+        data, crop = FLAC(str(job.a_src)).pictures[job.a_meta.cover_idx].data, True
+    else:
+        data, crop = _PLACEHOLDER.read_bytes(), False
+
+    pic = Picture()
+    pic.type = 3  # Front Cover
+    pic.mime = "image/jpeg"
+    pic.desc = "Front Cover"
+    pic.width = pic.height = COVER_SIZE
+    pic.depth = 24
+    pic.data = _cover_jpeg(data, crop)
+
+    shutil.copyfile(job.a_src, job.c_tmp)
+    out = FLAC(str(job.c_tmp))
+    if out.tags is None:
+        out.add_tags()
+    out.tags.clear()
+    for k, vals in job.b_meta.tags.items():
+        out[k] = vals
+    for k, v in job.a_meta.mx_tags.items():
+        out[k] = v  # A überschreibt B
+    out.clear_pictures()
+    out.add_picture(pic)
+    out.save()
+    job.via_mutagen = True
+
+
+def run_ffmpeg(logger: DualLogger, cmd: list[str], what: str) -> None:
+    """Führt ffmpeg aus; MergeError bei Startfehler oder Returncode != 0."""
+    # Fürs Log in einem Aufruf quoten
+    logger.detail(f"ffmpeg: {subprocess.list2cmdline(cmd)}")
 
-    # ffmpeg ausführen
     try:
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE, text=True)
+        # errors="replace": Nicht-UTF-8-Bytes (Dateinamen, Tags) dürfen den
+        # Drain-Thread nicht beenden, sonst blockiert ffmpeg an vollem stderr
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                encoding="utf-8", errors="replace", bufsize=1 << 20)
     except FileNotFoundError:
-        fail(logger, EXIT_EXT_TOOLS, "ffmpeg nicht gefunden (PATH prüfen)")
+        raise MergeError(EXIT_EXT_TOOLS, "ffmpeg nicht gefunden (PATH prüfen)")
     except Exception as e:
-        fail(logger, EXIT_INTERNAL, f"ffmpeg-Start fehlgeschlagen: {e}")
+        raise MergeError(EXIT_INTERNAL, f"ffmpeg-Start fehlgeschlagen: {e}")
+
+    # stderr laufend leeren (kein Pipe-Stau), nur die letzten 5 Zeilen behalten
+    tail: deque[str] = deque(maxlen=5)
+
+    def drain() -> None:
+        for line in proc.stderr:
+            line = line.strip()
+            if line:
+                tail.append(line)
 
-    if proc.returncode != 0:
-        err_preview = (proc.stderr or "").strip().splitlines()[-5:]
-        logger.detail("ffmpeg stderr (tail): " + " | ".join(err_preview))
-        fail(logger, EXIT_INTERNAL,
-             f"ffmpeg returned {proc.returncode} für B=\"{b_rel.as_posix()}\"")
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    returncode = proc.wait()
+    reader.join()
+    proc.stderr.close()
 
-    # mx-* aus A auf Ergebnis schreiben (überschreibt ggf. B)
-    wrote = set_mx_tags_from_a_on_target(a_src, c_tmp)
+    if returncode != 0:
+        logger.detail("ffmpeg stderr (tail): " + " | ".join(tail))
+        raise MergeError(EXIT_INTERNAL,
+                         f"ffmpeg returned {returncode} für {what}")
+
+
+def finish_pair(logger: DualLogger, job: PairJob) -> None:
+    """mx-* aus A schreiben, touch_comment_tag, atomar finalisieren, Abschlusszeile."""
+    c_tmp = job.c_tmp
+
+    # mx-* aus A auf Ergebnis schreiben (überschreibt ggf. B); im Mutagen-Pfad schon erledigt
+    if job.via_mutagen:
+        wrote = len(job.a_meta.mx_tags)
+    else:
+        wrote = apply_mx_tags(c_tmp, job.a_meta.mx_tags)
 
     # touch_comment_tag am Ende
     try:
         flaclib.touch_comment_tag(c_tmp)
     except Exception as e:
-        fail(logger, EXIT_INTERNAL, f"touch_comment_tag fehlgeschlagen: {e}")
+        raise MergeError(EXIT_INTERNAL, f"touch_comment_tag fehlgeschlagen: {e}")
 
     # Atomar finalisieren
     try:
-        os.replace(c_tmp, c_target)
+        os.replace(c_tmp, job.c_target)
     except Exception as e:
         try:
             if c_tmp.exists():
                 c_tmp.unlink()
         except Exception:
             pass
-        fail(logger, EXIT_IO, f"Zielschreiben fehlgeschlagen: {e}")
+        raise MergeError(EXIT_IO, f"Zielschreiben fehlgeschlagen: {e}")
 
     # Abschlusszeile
+    a_cover_idx = job.a_meta.cover_idx
+    b_cover_idx = job.b_meta.cover_idx
     if b_cover_idx is not None:
         cover_src = f"B:embedded(idx={b_cover_idx})"
     elif a_cover_idx is not None:
@@ -340,12 +487,70 @@ def process_pair(
         cover_src = "placeholder"
 
     logger.status(
-        f"[OK]  hash={h}  B=\"{b_rel.as_posix()}\"  C=\"{(Path(C_DIRNAME) / b_rel).as_posix()}\"  "
-        f"audio:A=\"{a_rel.as_posix()}\"(copy)  cover={cover_src}(600x600)  "
+        f"[OK]  hash={job.h}  B=\"{job.b_rel.as_posix()}\"  C=\"{(Path(C_DIRNAME) / job.b_rel).as_posix()}\"  "
+        f"audio:A=\"{job.a_rel.as_posix()}\"(copy)  cover={cover_src}(600x600)  "
         f"tags:B=all + A=mx-* overwrite  wrote={wrote}"
     )
 
 
+def process_batch(logger: DualLogger, jobs: List[PairJob]) -> None:
+    """
+    Verarbeitet mehrere Paare: zuerst je Paar merge_via_mutagen; alle Paare,
+    bei denen das scheitert, laufen gemeinsam durch einen ffmpeg-Prozess.
+    Scheitert der Batch-Aufruf, werden die Paare einzeln wiederholt, damit
+    der Fehler dem konkreten Paar zugeordnet wird.
+    """
+    for job in jobs:
+        logger.status(
+            f"[DO] hash={job.h}  B=\"{job.b_rel.as_posix()}\"  →  C=\"{(Path(C_DIRNAME) / job.b_rel).as_posix()}\""
+        )
+
+    fallback: List[PairJob] = []
+    for job in jobs:
+        try:
+            merge_via_mutagen(job)
+        except Exception as e:
+            logger.detail(
+                f"Mutagen-Merge fehlgeschlagen ({e}) – Fallback ffmpeg: B=\"{job.b_rel.as_posix()}\"")
+            if job.c_tmp.exists():
+                job.c_tmp.unlink()
+            fallback.append(job)
+
+    if fallback:
+        run_ffmpeg_batch(logger, fallback)
+
+    for job in jobs:
+        finish_pair(logger, job)
+
+
+def run_ffmpeg_batch(logger: DualLogger, jobs: List[PairJob]) -> None:
+    """Ein ffmpeg-Prozess für alle jobs; bei Fehler Einzelaufrufe je Paar."""
+    try:
+        run_ffmpeg(logger, build_ffmpeg_cmd(jobs),
+                   f"Batch ab B=\"{jobs[0].b_rel.as_posix()}\" ({len(jobs)} Paare)")
+    except MergeError as e:
+        if len(jobs) == 1 or e.code == EXIT_EXT_TOOLS:
+            raise
+        logger.detail(f"Batch fehlgeschlagen ({e}) – Fallback: Einzelaufrufe")
+        for job in jobs:
+            if job.c_tmp.exists():
+                job.c_tmp.unlink()
+        for job in jobs:
+            run_ffmpeg(logger, build_ffmpeg_cmd([job]),
+                       f"B=\"{job.b_rel.as_posix()}\"")
+
+
+def run_batch(
+    logger: DualLogger, jobs: List[PairJob]
+) -> Tuple[int, Exception | None]:
+    """Führt process_batch aus und liefert (Anzahl, Fehler|None) statt selbst abzubrechen."""
+    try:
+        process_batch(logger, jobs)
+        return len(jobs), None
+    except Exception as e:
+        return len(jobs), e
+
+
 # --- main -------------------------------------------------------------------
 
 def main(argv: List[str] | None = None) -> None:
@@ -358,6 +563,11 @@ def main(argv: List[str] | None = None) -> None:
         action="store_true",
         help="Zusätzlich das komplette ffmpeg-Kommando auf der Konsole ausgeben (im Log ist es immer enthalten).",
     )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="Paare seriell statt parallel verarbeiten (Debugging).",
+    )
     parser.add_argument("--version", action="version", version="abmerge 1.0")
     args = parser.parse_args(argv)
 
@@ -372,15 +582,15 @@ def main(argv: List[str] | None = None) -> None:
         a_root, b_root, c_root = check_preconditions(
             logger, Path(".").resolve())
 
-        # Discovery
-        a_files = discover_flacs(a_root)
-        b_files = discover_flacs(b_root)
+        # Discovery + Vorab-Scan (gestreamt): mx-hash, mx-* und Cover-Info mit einem Load pro Datei
+        a_meta = scan_flacs(a_root, discover_flacs(a_root))
+        b_meta = scan_flacs(b_root, discover_flacs(b_root))
         logger.status(
-            f"[INFO] gefunden: A={len(a_files)} .flac  B={len(b_files)} .flac")
+            f"[INFO] gefunden: A={len(a_meta)} .flac  B={len(b_meta)} .flac")
 
         # Pairing 1:1 via mx-hash
         try:
-            pairs = pair_by_hash(a_root, b_root, a_files, b_files)
+            pairs = pair_by_hash(a_meta, b_meta)
         except ValueError as e:
             fail(logger, EXIT_PAIRING, f"Nutzerfehler in der Paarbildung: {e}")
 
@@ -393,9 +603,37 @@ def main(argv: List[str] | None = None) -> None:
         except Exception as e:
             fail(logger, EXIT_IO, f"Kann '{C_DIRNAME}/' nicht anlegen: {e}")
 
-        # Verarbeitung (seriell)
-        for h, a_rel, b_rel in pairs:
-            process_pair(logger, a_root, b_root, c_root, h, a_rel, b_rel)
+        # Zielpfade vorbereiten (harter Abbruch, falls ein Ziel schon existiert)
+        jobs = [
+            prepare_pair(a_root, b_root, c_root, h, a_rel, b_rel,
+                         a_meta[a_rel], b_meta[b_rel])
+            for h, a_rel, b_rel in pairs
+        ]
+
+        # Batches: mehrere Paare je ffmpeg-Prozess, aber alle Worker beschäftigt
+        workers = 1 if args.serial else (os.cpu_count() or 1)
+        size = max(1, min(BATCH_MAX, math.ceil(len(jobs) / workers)))
+        batches = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+        # Verarbeitung: parallel (ffmpeg läuft im Subprozess), optional seriell
+        if args.serial:
+            for batch in batches:
+                _, err = run_batch(logger, batch)
+                if err is not None:
+                    raise err
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(run_batch, logger, batch)
+                    for batch in batches
+                ]
+                for fut in as_completed(futures):
+                    _, err = fut.result()
+                    if err is not None:
+                        # erster Fehler: Rest verwerfen, laufende ffmpeg-Jobs abwarten
+                        for other in futures:
+                            other.cancel()
+                        raise err
 
         logger.status(f"[DONE] erfolgreich: {len(pairs)} Datei(en) gemerged.")
         logger.close()
@@ -404,6 +642,8 @@ def main(argv: List[str] | None = None) -> None:
     except SystemExit:
         # bereits handled
         raise
+    except MergeError as e:
+        fail(logger, e.code, str(e))
     except RuntimeError as e:
         # z. B. aus lib.flac/_ffprobe_json
         fail(logger, EXIT_INTERNAL, f"Runtime-Fehler: {e}")
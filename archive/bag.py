@@ -10,6 +10,7 @@ Bricht ab, wenn auch nur eine Datei kein GEN0-SHA256-Tag oder keinen LUFS-Tag ha
 
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from lib.config import WORKSPACE_ROOT, BAG_ROOT, BAG_LUFS
 from lib.utils import find_audio_files
@@ -18,15 +19,35 @@ from lib.file import get_tags, touch_comment_tag, to_bag
 
 def check_tauglichkeit(files):
     """
-    Prüft, ob jede Datei GEN0-SHA256- und LUFS-Tag besitzt.
-    Gibt Liste untauglicher Files (mit fehlendem Tag) zurück.
+    Prüft, ob jede Datei GEN0-SHA256- und LUFS-Tag besitzt (ein Tag-Read pro Datei).
+    Gibt (tauglich, untauglich) zurück:
+      tauglich:   Dict[Path, (sha, lufs)] der bestandenen Files
+      untauglich: Liste (f, tags) der Files mit fehlendem Tag
     """
+    tauglich = {}
     untauglich = []
     for f in files:
         tags = get_tags(f, ["gen0-sha256", "lufs"])
         if not tags["gen0-sha256"] or not tags["lufs"]:
             untauglich.append((f, tags))
-    return untauglich
+        else:
+            tauglich[f] = (tags["gen0-sha256"], float(tags["lufs"]))
+    return tauglich, untauglich
+
+
+def _one_file(f, sha, lufs, target_lufs, bag_root):
+    """
+    Baggiert eine Datei (Worker-Prozess). Gibt den Zielpfad zurück; Fehler werden geworfen.
+    """
+    out_flac = Path(bag_root) / f"{sha}.flac"
+    to_bag(
+        src_flac=f,
+        dst_flac=out_flac,
+        src_lufs=lufs,
+        target_lufs=target_lufs
+    )
+    touch_comment_tag(out_flac)
+    return out_flac
 
 
 def main():
@@ -36,7 +57,7 @@ def main():
         print(f"[INFO] Keine Audiodateien in {WORKSPACE_ROOT} gefunden.")
         sys.exit(0)
 
-    untauglich = check_tauglichkeit(files)
+    tauglich, untauglich = check_tauglichkeit(files)
     if untauglich:
         print("[ERROR] Es gibt untaugliche Dateien! Abbruch.")
         for f, tags in untauglich:
@@ -54,25 +75,32 @@ def main():
         f"[INFO] {len(files)} Dateien werden in den Bag exportiert (Target LUFS: {BAG_LUFS})")
     os.makedirs(BAG_ROOT, exist_ok=True)
 
+    # Gleicher GEN0-SHA256 -> gleiches Ziel {sha}.flac: vorab auf eine Quelle
+    # pro Hash reduzieren, sonst schreiben Worker parallel in dieselbe Datei.
+    # Wie im seriellen Lauf gewinnt die letzte Quelle.
+    per_sha = {}
+    for f, (sha, lufs) in tauglich.items():
+        if sha in per_sha:
+            print(f"[INFO] Doppelter GEN0-SHA256 {sha}: {per_sha[sha][0]} übersprungen, nutze {f}")
+        per_sha[sha] = (f, lufs)
+
     ok, err = 0, 0
-    for f in files:
-        tags = get_tags(f, ["gen0-sha256", "lufs"])
-        sha = tags["gen0-sha256"]
-        lufs = float(tags["lufs"])
-        out_flac = Path(BAG_ROOT) / f"{sha}.flac"
-        try:
-            to_bag(
-                src_flac=f,
-                dst_flac=out_flac,
-                src_lufs=lufs,
-                target_lufs=BAG_LUFS
-            )
-            touch_comment_tag(out_flac)
-            print(f"[OK] {f} → {out_flac} ({lufs:+.1f}dB → {BAG_LUFS:+.1f}dB)")
-            ok += 1
-        except Exception as e:
-            print(f"[FEHLER] {f}: {e}")
-            err += 1
+    # Jede Datei ist unabhängig (Ziel: {sha}.flac) -> parallel in Prozessen
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {}
+        for sha, (f, lufs) in per_sha.items():
+            fut = pool.submit(_one_file, f, sha, lufs, BAG_LUFS, BAG_ROOT)
+            futures[fut] = (f, lufs)
+
+        for fut in as_completed(futures):
+            f, lufs = futures[fut]
+            try:
+                out_flac = fut.result()
+                print(f"[OK] {f} → {out_flac} ({lufs:+.1f}dB → {BAG_LUFS:+.1f}dB)")
+                ok += 1
+            except Exception as e:
+                print(f"[FEHLER] {f}: {e}")
+                err += 1
     print(f"\n[INFO] {ok} Dateien erfolgreich baggiert, {err} Fehler.")
 
 
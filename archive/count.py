@@ -5,12 +5,15 @@ Zählt alle gängigen Audiodateien im aktuellen Ordner und in allen Unterordnern
 und gibt zusätzliche Statistik aus (auch Dubletten).
 """
 
+import os
 from pathlib import Path
 from collections import Counter, defaultdict
 from lib.utils import find_audio_files
 from lib.config import EXTENDED_AUDIO_EXTENSIONS
 
 IN_DIR = Path('.').resolve()
+# Mitgliedstest je Datei: frozenset statt (sortierter) Liste
+EXTENDED = frozenset(e.lower() for e in EXTENDED_AUDIO_EXTENSIONS)
 
 
 def collect_audio_stats(root, extensions):
@@ -18,26 +21,42 @@ def collect_audio_stats(root, extensions):
     per_ext = Counter()
     per_folder = defaultdict(int)
     subfolders = set()
-    name_map = defaultdict(list)
+    stems = []  # parallel zu paths; Gruppen nur für mehrfache Namen (s. u.)
+    paths = []
+    folder_ext = defaultdict(Counter)  # Ordner -> Endung -> Anzahl
 
-    for rel_path in find_audio_files(root, filter_ext=EXTENDED_AUDIO_EXTENSIONS):
-        if rel_path.suffix.lower() not in extensions:
+    for rel_path in find_audio_files(root, filter_ext=extensions):
+        # Felder einmal per String-Operationen statt über PurePath-Attribute
+        rel = os.fspath(rel_path)
+        folder, name = os.path.split(rel)
+        name_ohne_ext, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext not in extensions:
             continue
         total += 1
-        ext = rel_path.suffix.lower()
         per_ext[ext] += 1
-        folder = str(rel_path.parent)
-        if folder and folder != ".":
+        if folder:
             subfolders.add(folder)
+        else:
+            folder = "."
         per_folder[folder] += 1
-        name_ohne_ext = rel_path.stem
-        name_map[name_ohne_ext].append(rel_path.as_posix())
-    return total, per_ext, per_folder, subfolders, name_map
+        folder_ext[folder][ext] += 1
+        stems.append(name_ohne_ext)
+        paths.append(rel.replace(os.sep, "/"))
+
+    # Dubletten: Namen zählen, nur mehrfach vorkommende gruppieren
+    # (Reihenfolge: erstes Auftreten, wie bisher)
+    counts = Counter(stems)
+    duplicates = {}
+    for stem, path in zip(stems, paths):
+        if counts[stem] > 1:
+            duplicates.setdefault(stem, []).append(path)
+    return total, per_ext, per_folder, subfolders, duplicates, folder_ext
 
 
 def main():
-    total, per_ext, per_folder, subfolders, name_map = collect_audio_stats(
-        IN_DIR, EXTENDED_AUDIO_EXTENSIONS)
+    total, per_ext, per_folder, subfolders, duplicates, folder_ext = collect_audio_stats(
+        IN_DIR, EXTENDED)
     print(f"\nGefundene Audiodateien: {total}")
     print("\nDavon pro Dateityp:")
     for ext, count in per_ext.items():
@@ -45,27 +64,17 @@ def main():
 
     print(f"\nUnterschiedliche Unterordner (außer Root): {len(subfolders)}")
     for folder in sorted(per_folder):
-        # Alle Dateien im Ordner filtern
-        ext_counts = Counter()
-        for rel_path in name_map.values():
-            for path in rel_path:
-                if Path(path).parent == Path(folder):
-                    ext = Path(path).suffix.lower()
-                    ext_counts[ext] += 1
-        # Ausgabe formatieren
+        # Endungen je Ordner stammen aus dem Sammel-Durchlauf (kein Rescan aller Pfade)
         ext_summary = "; ".join(
-            f"{ext}: {count}" for ext, count in ext_counts.items())
+            f"{ext}: {count}" for ext, count in folder_ext[folder].items())
         print(f"  {folder}: {ext_summary}")
 
     print("\nNamens-Dubletten (gleicher Name, unterschiedliche Endung oder Ordner):")
-    found = False
-    for name, paths in name_map.items():
-        if len(paths) > 1:
-            found = True
-            print(f'  "{name}" in:')
-            for p in paths:
-                print(f"    {p}")
-    if not found:
+    for name, paths in duplicates.items():
+        print(f'  "{name}" in:')
+        for p in paths:
+            print(f"    {p}")
+    if not duplicates:
         print("  Keine Dubletten gefunden.")
 
     print()
@@ -62,9 +62,13 @@ def validate_audio_filename(audiofile):
     return SUPPORTED_FORMATS[ext]
 
 
-def check_latin1_compatibility(s, context):
+def encode_latin1(s, context):
+    """Kodiert s genau einmal nach latin-1; bei nicht darstellbarem Zeichen Abbruch mit Hinweis."""
+    # Häufigster Fall: reines ASCII (C-Check, identische Bytes, kein try/except-Pfad)
+    if s.isascii():
+        return s.encode('ascii')
     try:
-        s.encode('latin-1')
+        return s.encode('latin-1')
     except UnicodeEncodeError as e:
         offending_char = s[e.start:e.end]
         error_exit(
@@ -73,44 +77,29 @@ def check_latin1_compatibility(s, context):
         )
 
 
-def validate_labels_for_encoding(labels, performer, albumtitle):
-    if performer:
-        check_latin1_compatibility(performer, f"Performer '{performer}'")
-    if albumtitle:
-        check_latin1_compatibility(albumtitle, f"Albumtitel '{albumtitle}'")
-    for idx, label in enumerate(labels, 1):
-        check_latin1_compatibility(label, f"Label '{label}' (Track {idx})")
-
-
-def validate_input_file(input_path):
-    lines = []
-    with open(input_path, encoding='utf-8') as f:
-        for i, raw_line in enumerate(f, 1):
-            line = raw_line.rstrip('\n\r')
-            parts = line.split('\t')
-            if len(parts) != 3:
-                error_exit(
-                    f"Zeile {i}: Falsches Format! "
-                    "Erwartet werden drei Tab-getrennte Felder: Startzeit<TAB>Endzeit<TAB>Label "
-                    "(Label darf leer sein). Prüfen Sie Ihre Eingabedatei!"
-                )
-            # Prüfe Startzeit
-            try:
-                start_time = float(parts[0].replace(',', '.'))
-            except ValueError:
-                error_exit(
-                    f"Zeile {i}: Startzeit ist ungültig oder fehlt ('{parts[0]}').")
-            # Endzeit (wird ignoriert, kann aber geprüft werden)
-            try:
-                _ = float(parts[1].replace(',', '.'))
-            except ValueError:
-                error_exit(
-                    f"Zeile {i}: Endzeit ist ungültig oder fehlt ('{parts[1]}').")
-            label = parts[2].strip()
-            lines.append((start_time, label, i))
-    if not lines:
-        error_exit("Keine Marker in der Eingabedatei gefunden.")
-    return lines
+def parse_marker_line(line, i):
+    """Zerlegt eine Marker-Zeile; gibt (start_time, label) zurück oder bricht ab."""
+    parts = line.split('\t')
+    if len(parts) != 3:
+        error_exit(
+            f"Zeile {i}: Falsches Format! "
+            "Erwartet werden drei Tab-getrennte Felder: Startzeit<TAB>Endzeit<TAB>Label "
+            "(Label darf leer sein). Prüfen Sie Ihre Eingabedatei!"
+        )
+    start_raw, end_raw, label = parts
+    # Prüfe Startzeit
+    try:
+        start_time = float(start_raw.replace(',', '.'))
+    except ValueError:
+        error_exit(
+            f"Zeile {i}: Startzeit ist ungültig oder fehlt ('{start_raw}').")
+    # Endzeit (wird ignoriert, kann aber geprüft werden)
+    try:
+        float(end_raw.replace(',', '.'))
+    except ValueError:
+        error_exit(
+            f"Zeile {i}: Endzeit ist ungültig oder fehlt ('{end_raw}').")
+    return start_time, label.strip()
 
 
 def seconds_to_cue_time(seconds):
@@ -128,30 +117,51 @@ def seconds_to_cue_time(seconds):
     return f"{minutes:02d}:{sec:02d}:{frames:02d}"
 
 
-def build_cue_content(
-    marker_lines, audiofile, audioformat, performer, albumtitle, trackstart
+def build_cue_lines(
+    input_path, audiofile, audioformat, performer, albumtitle, trackstart
 ):
+    """
+    Liest die Marker-Datei in einem Durchgang: jede Zeile wird geprüft und
+    sofort als fertige, einmal latin-1-kodierte CUE-Zeile (bytes) ausgegeben.
+    Gibt (Zeilen, Anzahl Tracks) zurück.
+    """
     out = []
-    out.append(f'FILE "{audiofile}" {audioformat}')
+    out.append(encode_latin1(f'FILE "{audiofile}" {audioformat}',
+                             f"Audiodatei '{audiofile}'"))
     if performer:
-        out.append(f'PERFORMER "{performer}"')
+        out.append(b'PERFORMER "' +
+                   encode_latin1(performer, f"Performer '{performer}'") + b'"')
     if albumtitle:
-        out.append(f'TITLE "{albumtitle}"')
-    for idx, (start_time, label, _) in enumerate(marker_lines, trackstart):
-        track_label = label if label else f"Titel {idx}"
-        out.append(f'  TRACK {idx:02d} AUDIO')
-        out.append(f'    TITLE "{track_label}"')
-        out.append(f'    INDEX 01 {seconds_to_cue_time(start_time)}')
-    return '\n'.join(out) + '\n'
+        out.append(b'TITLE "' +
+                   encode_latin1(albumtitle, f"Albumtitel '{albumtitle}'") + b'"')
+
+    idx = trackstart
+    with open(input_path, encoding='utf-8') as f:
+        for i, raw_line in enumerate(f, 1):
+            start_time, label = parse_marker_line(raw_line.rstrip('\n\r'), i)
+            track_label = label if label else f"Titel {idx}"
+            out.append(f'  TRACK {idx:02d} AUDIO'.encode('ascii'))
+            out.append(b'    TITLE "' + encode_latin1(
+                track_label, f"Label '{track_label}' (Track {idx - trackstart + 1})") + b'"')
+            out.append(
+                f'    INDEX 01 {seconds_to_cue_time(start_time)}'.encode('ascii'))
+            idx += 1
+
+    count = idx - trackstart
+    if not count:
+        error_exit("Keine Marker in der Eingabedatei gefunden.")
+    return out, count
 
 
-def write_cue_file(outfile, cue_content):
+def write_cue_file(outfile, cue_lines):
     if os.path.exists(outfile):
         error_exit(
             f"Die Ausgabedatei '{outfile}' existiert bereits. Bitte löschen oder einen anderen Namen wählen.")
+    # Zeilenende wie bisher im Textmodus: plattformabhängig (os.linesep)
+    eol = os.linesep.encode('ascii')
     try:
-        with open(outfile, 'w', encoding='latin-1') as f:
-            f.write(cue_content)
+        with open(outfile, 'wb') as f:
+            f.write(eol.join(cue_lines) + eol)
     except Exception as e:
         error_exit(f"Fehler beim Schreiben der .cue-Datei: {e}")
 
@@ -163,18 +173,13 @@ def main():
         basename = os.path.splitext(os.path.basename(args.infile))[0]
         outfile = basename + '.cue'
     audioformat = validate_audio_filename(args.audiofile)
-    marker_lines = validate_input_file(args.infile)
-    all_labels = [
-        label if label else f"Titel {i+args.trackstart}" for i, (_, label, _) in enumerate(marker_lines)]
-    validate_labels_for_encoding(
-        all_labels, args.performer or '', args.title or '')
-    cue_content = build_cue_content(
-        marker_lines, args.audiofile, audioformat,
+    cue_lines, track_count = build_cue_lines(
+        args.infile, args.audiofile, audioformat,
         args.performer or '', args.title or '', args.trackstart
     )
-    write_cue_file(outfile, cue_content)
+    write_cue_file(outfile, cue_lines)
     print(
-        f"Erfolgreich {len(marker_lines)} Tracks in '{outfile}' geschrieben.")
+        f"Erfolgreich {track_count} Tracks in '{outfile}' geschrieben.")
 
 
 if __name__ == "__main__":
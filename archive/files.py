@@ -1,6 +1,7 @@
 # files.py (CLI)
 
 import argparse
+import os
 from pathlib import Path
 from lib.utils import find_audio_files
 from lib.file import renew_flac
@@ -17,20 +18,20 @@ def handle_renew(args):
         print(f"[RENEW] {file}")
         # bricht bei Fehler sofort mit Exception ab
         new_file = renew_flac(Path(file))
-        old_file = Path(file).with_suffix(".flac.old")
 
+        if args.delete_old:
+            # kein Backup gewünscht: neue Datei ersetzt das Original atomar in einem Schritt
+            os.replace(new_file, file)
+            continue
+
+        old_file = Path(file).with_suffix(".flac.old")
         Path(file).rename(old_file)
         new_file.rename(file)
 
         old_files.append(old_file)
 
     if args.delete_old:
-        removed = 0
-        for of in old_files:
-            if of.exists():
-                of.unlink()
-                removed += 1
-        print(f"[CLEANUP] removed {removed} .flac.old")
+        print(f"[CLEANUP] {len(files)} Original(e) direkt ersetzt, keine .flac.old angelegt")
 
 
 def main():
@@ -42,7 +43,7 @@ def main():
     renew_parser.add_argument(
         "dir", nargs="?", default=".", help="Startverzeichnis (Standard: aktuelles)")
     renew_parser.add_argument(
-        "--delete-old", action="store_true", help="Alle .flac.old am Ende löschen")
+        "--delete-old", action="store_true", help="Originale ohne .flac.old-Backup direkt ersetzen")
 
     args = parser.parse_args()
 
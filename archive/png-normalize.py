@@ -2,10 +2,13 @@
 from __future__ import annotations
 import subprocess
 import shutil
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import csv
 import sys
+import argparse
 
 # --- Konfiguration ---
 SIZES = [256, 128, 64]   # Zielgrößen (Quadrate)
@@ -40,23 +43,14 @@ def timestamp_folder(prefix: str = "normalize") -> Path:
     return p
 
 
-def build_im_command(im_bin: list[str], src: Path, dst: Path, size: int) -> list[str]:
+def build_size_ops(size: int) -> list[str]:
     """
-    Baut den ImageMagick-Aufruf.
+    IM-Operatoren für eine Zielgröße.
     Ziel: proportional einpassen, auf NxN zentrieren, Weiß auffüllen,
-          Transparenz entfernen, sRGB, 8-Bit TrueColor, Metadaten strippen.
+          Transparenz entfernen, 8-Bit TrueColor, Metadaten strippen.
     Reihenfolge der Operatoren ist bei IM wichtig.
     """
-    cmd = im_bin[:]  # ['magick'] oder ['convert']
-
-    # IM7: "magick input ... output"
-    # IM6: "convert input ... output"
-    cmd += [
-        str(src),
-
-        # 1) Sicherstellen, dass wir in sRGB arbeiten (konsistentes Rendering in Windows)
-        "-colorspace", "sRGB",
-
+    ops = [
         # 2) Proportional einpassen in die Zielbox (ohne Zuschneiden)
         #    z.B. 300x200 -> 256x171;  dann mit extent auf 256x256 erweitern.
         "-resize", f"{size}x{size}",
@@ -76,21 +70,109 @@ def build_im_command(im_bin: list[str], src: Path, dst: Path, size: int) -> list
     # 6) TrueColor erzwingen (keine Palette, kein Alpha)
     if FORCE_TRUECOLOR:
         # -alpha off stellt sicher, dass kein Alphakanal im Ergebnis landet.
-        cmd += ["-alpha", "off", "-type", "TrueColor"]
+        ops += ["-alpha", "off", "-type", "TrueColor"]
         # png:color-type=2 == Truecolor (RGB ohne Alpha)
-        cmd += ["-define", f"png:color-type={COLORTYPE_TRUECOLOR}"]
+        ops += ["-define", f"png:color-type={COLORTYPE_TRUECOLOR}"]
 
     # 7) Metadaten entfernen
     if STRIP_METADATA:
-        cmd += ["-strip"]
+        ops += ["-strip"]
+    return ops
+
+
+def build_im_command_multi(im_bin: list[str], src: Path, dsts: dict[int, Path]) -> list[str]:
+    """
+    Baut EINEN ImageMagick-Aufruf für alle Zielgrößen.
+    Quelle wird einmal dekodiert und nach sRGB gewandelt; jede Größe außer der
+    letzten arbeitet auf einem Klon ( +clone ... -write dst +delete ),
+    die letzte direkt auf dem Original.
+    """
+    cmd = im_bin[:]  # ['magick'] oder ['convert']
 
-    # 8) Zielpfad
-    cmd += [str(dst)]
+    # IM7: "magick input ... output"
+    # IM6: "convert input ... output"
+    cmd += [
+        str(src),
+
+        # 1) Sicherstellen, dass wir in sRGB arbeiten (konsistentes Rendering in Windows)
+        "-colorspace", "sRGB",
+    ]
+
+    *clones, (last_size, last_dst) = dsts.items()
+    for size, dst in clones:
+        cmd += ["(", "+clone", *build_size_ops(size), "-write", str(dst), "+delete", ")"]
+
+    # 8) Zielpfad (letzte Größe)
+    cmd += [*build_size_ops(last_size), str(last_dst)]
     return cmd
 
 
-def process_pngs():
-    im_bin = find_im_binary()
+def render_pillow(src: Path, dsts: dict[int, Path]) -> None:
+    """
+    In-Process-Variante von build_im_command_multi (Pillow):
+    einmal dekodieren, gegen Weiß flatten (kein Alpha), je Größe proportional
+    einpassen (auch hochskalieren, wie IM -resize), auf NxN zentrieren,
+    als 8-Bit-RGB-PNG ohne Metadaten speichern.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as im:
+        rgba = im.convert("RGBA")
+    bg = Image.new("RGB", rgba.size, BACKGROUND)
+    bg.paste(rgba, mask=rgba.getchannel("A"))
+
+    for size, dst in dsts.items():
+        fitted = ImageOps.contain(bg, (size, size), Image.LANCZOS)
+        canvas = Image.new("RGB", (size, size), BACKGROUND)
+        canvas.paste(fitted, ((size - fitted.width) // 2,
+                     (size - fitted.height) // 2))
+        canvas.save(dst, "PNG", optimize=True)
+
+
+def normalize_one(im_bin: list[str] | None, src: Path, out_dir: Path) -> list[str]:
+    """
+    Normalisiert ein PNG in alle SIZES; liefert die Manifest-Zeile.
+    im_bin=None -> Pillow, sonst ImageMagick.
+    """
+    base = src.stem
+    row = [src.name]
+
+    dsts = {size: out_dir / f"{base}_{size}_white.png" for size in SIZES}
+    if im_bin is None:
+        try:
+            render_pillow(src, dsts)
+        except Exception as e:
+            print(f"[FEHLER] {src}: {e}")
+    else:
+        cmd = build_im_command_multi(im_bin, src, dsts)
+        try:
+            subprocess.run(
+                cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            print(f"[FEHLER] {src}:",
+                  e.stderr.decode(errors="ignore")[:500])
+
+    for size, dst in dsts.items():
+        if dst.exists():
+            row.append(dst.name)
+            print(
+                f"[OK] {src.name} -> {dst.relative_to(out_dir.parent)}")
+        else:
+            # Im Fehlerfall trotzdem Platzhalter in Manifest
+            row.append("")
+    return row
+
+
+def process_pngs(backend: str = "pillow"):
+    if backend == "pillow":
+        # Pillow ist optional: einmal vorab prüfen statt pro Datei zu scheitern
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("Hinweis: Pillow nicht installiert, weiche auf ImageMagick aus "
+                  "(pip install Pillow für das In-Process-Backend).")
+            backend = "im"
+    im_bin = find_im_binary() if backend == "im" else None
     out_dir = timestamp_folder("normalize")
 
     # Optional: Manifest
@@ -104,31 +186,21 @@ def process_pngs():
             print("Keine PNGs im aktuellen Ordner gefunden.")
             return
 
-        for src in pngs:
-            base = src.stem
-            row = [src.name]
-
-            for size in SIZES:
-                dst = out_dir / f"{base}_{size}_white.png"
-                cmd = build_im_command(im_bin, src, dst, size)
-                try:
-                    subprocess.run(
-                        cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                except subprocess.CalledProcessError as e:
-                    print(f"[FEHLER] {src} @ {size}px:",
-                          e.stderr.decode(errors="ignore")[:500])
-                    # Im Fehlerfall trotzdem Platzhalter in Manifest
-                    row.append("")
-                else:
-                    row.append(dst.name)
-                    print(
-                        f"[OK] {src.name} -> {dst.relative_to(out_dir.parent)}")
-
-            writer.writerow(row)
+        # IM läuft im Subprozess, Pillow gibt beim Dekodieren/Skalieren den GIL frei
+        # -> Threads genügen; Manifest nur im Hauptthread
+        # schreiben (map liefert in Eingabereihenfolge -> stabile Reihenfolge)
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            for row in pool.map(lambda src: normalize_one(im_bin, src, out_dir), pngs):
+                writer.writerow(row)
 
     print(f"\nFertig. Ausgabeordner: {out_dir.resolve()}")
     print(f"Manifest: {manifest_path.resolve()}")
 
 
 if __name__ == "__main__":
-    process_pngs()
+    parser = argparse.ArgumentParser(
+        description="Normalisiert alle PNGs im aktuellen Ordner auf weiße Quadrate (256/128/64).")
+    parser.add_argument("--backend", choices=["pillow", "im"], default="pillow",
+                        help="Renderer: Pillow in-process (Standard, ohne Pillow -> ImageMagick) oder ImageMagick-Subprozess")
+    args = parser.parse_args()
+    process_pngs(args.backend)
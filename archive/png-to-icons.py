@@ -1,17 +1,30 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import csv
+import os
+import queue
+import threading
 import sys
 import shutil
+import struct
 import subprocess
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from typing import NamedTuple
+
+try:
+    # optional: MagickWand in-process (kein fork/exec je ICO); sonst IM-Subprozess
+    from wand.image import Image as WandImage
+except ImportError:
+    WandImage = None
 
 # Erwartete Größen-Spalten im Manifest:
 #   source, out_256, out_128, out_64
-EXPECTED_SIZES = [64, 128, 256]  # aufsteigend
+SIZE_COLS = [(64, "out_64"), (128, "out_128"), (256, "out_256")]  # aufsteigend
 MANIFEST_NAME = "manifest.csv"
 ICON_PREFIX = "icons"
+ICO_BATCH = 16  # ICOs pro ImageMagick-Aufruf
 
 
 def find_im_binary() -> list[str]:
@@ -27,53 +40,255 @@ def find_im_binary() -> list[str]:
 
 
 def timestamp_folder(prefix: str) -> Path:
-    ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    p = Path(f"{prefix}-{ts}")
-    p.mkdir(parents=True, exist_ok=False)
-    return p
+    """Legt <prefix>-<timestamp> an; existiert er schon (gleiche Sekunde), mit -1, -2, ..."""
+    name = f"{prefix}-{time.strftime('%Y-%m-%d_%H-%M-%S')}"
+    p = Path(name)
+    i = 0
+    while True:
+        try:
+            p.mkdir(parents=True)
+            return p
+        except FileExistsError:
+            i += 1
+            p = Path(f"{name}-{i}")
 
 
-def parse_headers_case_insensitive(reader: csv.DictReader) -> dict[str, str]:
-    """Mappt erwartete Spaltennamen (lowercase) auf die tatsächlichen Header aus dem CSV."""
-    headers = {h.lower(): h for h in (reader.fieldnames or [])}
+def parse_headers_case_insensitive(fieldnames: list[str] | None) -> dict[str, int]:
+    """Mappt erwartete Spaltennamen (lowercase) auf den Spaltenindex im CSV-Header."""
+    headers: dict[str, int] = {}
+    for i, h in enumerate(fieldnames or []):
+        headers.setdefault(h.lower(), i)
     need = ["source", "out_256", "out_128", "out_64"]
     missing = [n for n in need if n not in headers]
     if missing:
         sys.exit(
-            f"Fehler im Manifest-Header. Erwartet: {', '.join(need)}. Gefunden: {reader.fieldnames}")
+            f"Fehler im Manifest-Header. Erwartet: {', '.join(need)}. Gefunden: {fieldnames}")
     return {n: headers[n] for n in need}
 
 
+def cell(row: list[str], idx: int) -> str:
+    """Zellwert (getrimmt); fehlende Spalten in kurzen Zeilen gelten als leer."""
+    return row[idx].strip() if idx < len(row) else ""
+
+
 def ensure_unique_path(p: Path) -> Path:
-    """Falls Datei existiert, hänge -1, -2, ... an den Namen an."""
-    if not p.exists():
-        return p
-    base, ext = p.stem, p.suffix
-    i = 1
+    """
+    Falls Datei existiert, hänge -1, -2, ... an den Namen an.
+    Der Name wird per O_CREAT|O_EXCL als leere Datei reserviert (kein TOCTOU
+    zwischen Prüfung und Schreiben durch die parallelen Jobs); der ICO-Build
+    überschreibt sie.
+    """
+    parent, base, ext = os.fspath(p.parent), p.stem, p.suffix
+    cand = os.fspath(p)
+    i = 0
     while True:
-        cand = p.with_name(f"{base}-{i}{ext}")
-        if not cand.exists():
-            return cand
-        i += 1
+        try:
+            os.close(os.open(cand, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return Path(cand)
+        except FileExistsError:
+            i += 1
+            cand = f"{parent}{os.sep}{base}-{i}{ext}"
+
+
+def file_listed(dir_cache: dict[str, set[str]], p: Path) -> bool:
+    """
+    Existenzprüfung über einmal je Verzeichnis gelesene os.scandir-Listings
+    (statt resolve() + exists() je Datei). Vergleich über os.path.normcase.
+    """
+    parent = os.fspath(p.parent)
+    names = dir_cache.get(parent)
+    if names is None:
+        try:
+            with os.scandir(parent) as it:
+                names = {os.path.normcase(e.name) for e in it if e.is_file()}
+        except OSError:
+            names = set()
+        dir_cache[parent] = names
+    return os.path.normcase(p.name) in names
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_header(path: Path) -> tuple[int, int, int, int] | None:
+    """
+    Schneller Plausibilitätscheck: PNG-Signatur + IHDR mit Breite/Höhe in 1..65535.
+    Gibt (Breite, Höhe, Bittiefe, Farbtyp) zurück, None bei korruptem Header.
+    """
+    try:
+        with open(path, "rb") as f:
+            buf = f.read(26)
+    except OSError:
+        return None
+    if len(buf) < 26 or buf[:8] != PNG_SIGNATURE or buf[12:16] != b"IHDR":
+        return None
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", buf[16:26])
+    if not (0 < width < 65536 and 0 < height < 65536):
+        return None
+    return width, height, bit_depth, color_type
+
+
+def frame_ready(size: int, header: tuple[int, int, int, int]) -> bool:
+    """
+    PNG entspricht bereits dem, was IM daraus machen würde (size×size,
+    8 Bit, Farbtyp 2 = TrueColor ohne Alpha) -> darf unverändert ins ICO.
+    """
+    return header == (size, size, 8, 2)
+
+
+def write_ico_from_pngs(out_ico: Path, input_paths: list[Path]) -> str | None:
+    """
+    ICO ohne ImageMagick: Header + Verzeichniseinträge + PNG-Frames unverändert
+    (PNG-Frames im ICO sind seit Vista zulässig). Gibt None oder die Fehlermeldung zurück.
+    """
+    try:
+        frames = [p.read_bytes() for p in input_paths]
+        parts = [struct.pack("<HHH", 0, 1, len(frames))]
+        offset = 6 + 16 * len(frames)
+        for data in frames:
+            width, height = struct.unpack(">II", data[16:24])
+            # 256 wird im ICO-Verzeichnis als 0 kodiert
+            parts.append(struct.pack("<BBBBHHII", width & 0xFF, height & 0xFF,
+                                     0, 0, 1, 24, len(data), offset))
+            offset += len(data)
+        with open(out_ico, "wb") as f:
+            f.write(b"".join(parts + frames))
+    except OSError as e:
+        return str(e)
+    return None
+
+
+class IcoJob(NamedTuple):
+    src_name: str
+    base: str
+    out_ico: Path
+    used_sizes: str       # z. B. "64;128;256"
+    input_paths: list[Path]
+    direct: bool          # alle Frames schon fertig -> write_ico_from_pngs
+
+
+# Normalisierung je ICO (nach den Inputs): Farben/Depth vereinheitlichen,
+# alpha off/TrueColor für maximale Kompatibilität, Metadaten/Profile strippen
+ICO_OPS = [
+    "-colorspace", "sRGB",
+    "-depth", "8",
+    "-alpha", "off",
+    "-type", "TrueColor",
+    "-strip",
+]
+# Settings vor den Inputs: keine OpenMP-Auffächerung neben dem Pool,
+# keine Zusatz-Chunks (iCCP/tEXt/zTXt …) in eingebetteten PNG-Frames
+IM_SETTINGS = [
+    "-limit", "thread", "1",
+    "-define", "png:exclude-chunk=all",
+]
 
 
 def build_im_ico_cmd(im_bin: list[str], inputs: list[Path], output_ico: Path) -> list[str]:
+    """Erzeuge den IM-Aufruf für ein ICO."""
+    return im_bin + IM_SETTINGS + [str(p) for p in inputs] + ICO_OPS + [str(output_ico)]
+
+
+def build_im_ico_batch_cmd(im_bin: list[str], jobs: list[IcoJob]) -> list[str]:
     """
-    Erzeuge den IM-Aufruf für ICO.
-    - Farben/Depth vereinheitlichen
-    - alpha off/TrueColor für maximale Kompatibilität
-    """
-    cmd = im_bin[:] + [str(p) for p in inputs]
-    cmd += [
-        "-colorspace", "sRGB",
-        "-depth", "8",
-        "-alpha", "off",
-        "-type", "TrueColor",
-        str(output_ico),
-    ]
+    Ein IM-Aufruf für mehrere ICOs: je Job außer dem letzten eine Klammergruppe
+    ( inputs … Optionen -write out.ico +delete ); der letzte Job ist die
+    reguläre Ausgabe. (Eine leere Bildliste nach "null:" zu schreiben bricht
+    mit "no images defined" ab.)
+    """
+    cmd = im_bin + IM_SETTINGS
+    *grouped, last = jobs
+    for job in grouped:
+        cmd += ["(", *map(str, job.input_paths), *ICO_OPS,
+                "-write", str(job.out_ico), "+delete", ")"]
+    cmd += [*map(str, last.input_paths), *ICO_OPS, str(last.out_ico)]
     return cmd
 
 
+def _run_im(cmd: list[str]) -> str | None:
+    """Führt IM aus; gibt None oder die Fehlermeldung (stderr-Auszug) zurück."""
+    try:
+        subprocess.run(cmd, check=True,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as e:
+        return e.stderr.decode(errors='ignore')[:800]
+    return None
+
+
+def build_icon_wand(input_paths: list[Path], out_ico: Path) -> str | None:
+    """
+    ICO in-process via Wand, gleiche Normalisierung wie build_im_ico_cmd.
+    Gibt None oder die Fehlermeldung zurück.
+    """
+    try:
+        with WandImage() as ico:
+            for p in input_paths:
+                with WandImage(filename=str(p)) as frame:
+                    frame.transform_colorspace("srgb")
+                    frame.depth = 8
+                    frame.alpha_channel = False
+                    frame.type = "truecolor"
+                    frame.strip()
+                    ico.sequence.append(frame)
+            ico.format = "ico"
+            ico.save(filename=str(out_ico))
+    except Exception as e:
+        return str(e)[:800]
+    return None
+
+
+def build_icons(im_bin: list[str] | None, jobs: list[IcoJob]) -> list[tuple[IcoJob, str | None]]:
+    """
+    Baut mehrere ICOs (Worker). Fertige Frames (job.direct) werden direkt
+    zusammengesetzt; der Rest mit im_bin=None in-process via Wand, sonst mit
+    einem IM-Prozess. Scheitert der Sammelaufruf, wird jeder Job einzeln
+    wiederholt, damit der Fehler der Zeile zugeordnet wird.
+    Gibt [(job, Fehler|None), ...] zurück.
+    """
+    results = [(job, write_ico_from_pngs(job.out_ico, job.input_paths))
+               for job in jobs if job.direct]
+    jobs = [job for job in jobs if not job.direct]
+
+    if im_bin is None:
+        results += [(job, build_icon_wand(job.input_paths, job.out_ico)) for job in jobs]
+    elif len(jobs) > 1 and _run_im(build_im_ico_batch_cmd(im_bin, jobs)) is None:
+        results += [(job, None) for job in jobs]
+    else:
+        results += [(job, _run_im(build_im_ico_cmd(im_bin, job.input_paths, job.out_ico)))
+                    for job in jobs]
+    return results
+
+
+def _writer_loop(results_q: queue.Queue, writer, stats: dict[str, int]) -> None:
+    """
+    Einziger Konsument fertiger Batches (Future, Jobs): schreibt Manifest-Zeilen
+    und Log, zählt Erfolge. Ende bei Sentinel None.
+    """
+    while True:
+        item = results_q.get()
+        if item is None:
+            return
+        fut, jobs = item
+        if fut.cancelled() or fut.exception() is not None:
+            # Batch komplett gescheitert oder nach Abbruch verworfen: reservierte
+            # (leere) Zielnamen freigeben; ein Fehler wird nach dem Join im
+            # Hauptthread erneut geworfen
+            for job in jobs:
+                job.out_ico.unlink(missing_ok=True)
+            continue
+        for (src_name, base, out_ico, used_sizes, _, _), err in fut.result():
+            if err is not None:
+                print(
+                    f"[FEHLER] ICO-Build für '{base}' fehlgeschlagen:\n{err}")
+                # reservierten (leeren/unvollständigen) Namen wieder freigeben
+                out_ico.unlink(missing_ok=True)
+                continue
+
+            writer.writerow([src_name, out_ico.name, used_sizes])
+            print(f"[OK] {src_name} → {out_ico}  (Größen: {used_sizes})")
+            stats["successes"] += 1
+
+
 def main():
     cwd = Path(".").resolve()
     manifest_path = cwd / MANIFEST_NAME
@@ -81,7 +296,7 @@ def main():
         sys.exit(
             f"Abbruch: '{MANIFEST_NAME}' nicht im aktuellen Ordner gefunden: {cwd}")
 
-    im_bin = find_im_binary()
+    im_bin = None if WandImage is not None else find_im_binary()
     out_dir = timestamp_folder(ICON_PREFIX)
     icons_manifest = out_dir / "icons_manifest.csv"
 
@@ -89,69 +304,105 @@ def main():
 
     with open(manifest_path, "r", newline="", encoding="utf-8") as f_in, \
             open(icons_manifest, "w", newline="", encoding="utf-8") as f_out:
-        reader = csv.DictReader(f_in)
-        header_map = parse_headers_case_insensitive(reader)
+        # csv.reader + Spaltenindizes statt DictReader (kein dict je Zeile)
+        reader = csv.reader(f_in)
+        col = parse_headers_case_insensitive(next(reader, None))
+        i_src = col["source"]
+        # Größe -> Spaltenindex einmalig (aufsteigend, daher kein Sortieren je Zeile)
+        size_idx = [(size, col[name]) for size, name in SIZE_COLS]
         writer = csv.writer(f_out)
         writer.writerow(["source", "ico", "used_sizes"])  # z. B. "64;128;256"
 
-        rows = list(reader)
-        if not rows:
-            sys.exit("Abbruch: Manifest enthält keine Zeilen.")
-
-        for row in rows:
-            src_name = (row.get(header_map["source"]) or "").strip()
-            if not src_name:
-                print("[WARN] Leerer 'source'-Eintrag – Zeile übersprungen.")
-                warnings += 1
-                continue
+        # Manifest gestreamt lesen: Batches gehen schon während des Parsens an den Pool
+        saw_any = False
 
-            # ICO-Dateiname vom Original ableiten (ohne Endung)
-            base = Path(src_name).stem
+        # Zeilen im Hauptthread vorbereiten (Zielname wird reserviert), IM-Aufrufe
+        # gebündelt (ICO_BATCH Zeilen je Prozess) im Pool; fertige Batches gehen
+        # über eine Queue an einen Writer-Thread (Manifest + Log)
+        pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        futures: list[Future] = []
+        results_q: queue.Queue = queue.Queue()
+        stats = {"successes": 0}
+        writer_thread = threading.Thread(
+            target=_writer_loop, args=(results_q, writer, stats))
+        writer_thread.start()
 
-            # Pfade zu vorbereiteten PNGs (relativ zum aktuellen Ordner)
-            size_to_field = {
-                256: (row.get(header_map["out_256"]) or "").strip(),
-                128: (row.get(header_map["out_128"]) or "").strip(),
-                64:  (row.get(header_map["out_64"]) or "").strip(),
-            }
+        def submit(jobs: list[IcoJob]) -> None:
+            fut = pool.submit(build_icons, im_bin, jobs)
+            # Jobs mitgeben: bei einer Exception des Batches kennt der Writer
+            # die reservierten Platzhalter
+            fut.add_done_callback(lambda f, jobs=jobs: results_q.put((f, jobs)))
+            futures.append(fut)
+        batch: list[IcoJob] = []
+        dir_cache: dict[str, set[str]] = {}
 
-            inputs: list[tuple[int, Path]] = []
-            for s in EXPECTED_SIZES:
-                rel = size_to_field.get(s) or ""
-                if not rel:
-                    continue
-                p = (cwd / rel).resolve()
-                if p.exists():
-                    inputs.append((s, p))
-                else:
-                    print(f"[WARN] Datei fehlt (Manifest-Eintrag): {rel}")
+        completed = False
+        try:
+            for row in reader:
+                if not row:
+                    continue  # Leerzeilen (wie DictReader) ignorieren
+                saw_any = True
+                src_name = cell(row, i_src)
+                if not src_name:
+                    print("[WARN] Leerer 'source'-Eintrag – Zeile übersprungen.")
                     warnings += 1
+                    continue
 
-            if not inputs:
-                print(
-                    f"[WARN] Keine verwertbaren PNGs für '{src_name}'. Übersprungen.")
-                warnings += 1
-                continue
+                # ICO-Dateiname vom Original ableiten (ohne Endung)
+                base = Path(src_name).stem
 
-            # aufsteigend nach Größe
-            inputs.sort(key=lambda t: t[0])
-            input_paths = [p for _, p in inputs]
+                # Pfade zu vorbereiteten PNGs (relativ zum aktuellen Ordner)
+                inputs: list[tuple[int, Path]] = []
+                direct = True
+                for s, idx in size_idx:
+                    rel = cell(row, idx)
+                    if not rel:
+                        continue
+                    p = cwd / rel
+                    if not file_listed(dir_cache, p):
+                        print(f"[WARN] Datei fehlt (Manifest-Eintrag): {rel}")
+                        warnings += 1
+                    elif (header := png_header(p)) is None:
+                        print(f"[WARN] Korruptes PNG (Header): {rel}")
+                        warnings += 1
+                    else:
+                        inputs.append((s, p))
+                        direct = direct and frame_ready(s, header)
 
-            out_ico = ensure_unique_path(out_dir / f"{base}.ico")
-            cmd = build_im_ico_cmd(im_bin, input_paths, out_ico)
+                if not inputs:
+                    print(
+                        f"[WARN] Keine verwertbaren PNGs für '{src_name}'. Übersprungen.")
+                    warnings += 1
+                    continue
 
-            try:
-                subprocess.run(cmd, check=True,
-                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError as e:
-                print(
-                    f"[FEHLER] ICO-Build für '{base}' fehlgeschlagen:\n{e.stderr.decode(errors='ignore')[:800]}")
-                continue
+                # aufsteigend nach Größe (Reihenfolge aus SIZE_COLS)
+                input_paths = [p for _, p in inputs]
 
-            used_sizes = ";".join(str(s) for s, _ in inputs)
-            writer.writerow([src_name, out_ico.name, used_sizes])
-            print(f"[OK] {src_name} → {out_ico}  (Größen: {used_sizes})")
-            successes += 1
+                out_ico = ensure_unique_path(out_dir / f"{base}.ico")
+
+                used_sizes = ";".join(str(s) for s, _ in inputs)
+                batch.append(IcoJob(src_name, base, out_ico,
+                             used_sizes, input_paths, direct))
+                if len(batch) == ICO_BATCH:
+                    submit(batch)
+                    batch = []
+            if batch:
+                submit(batch)
+                batch = []
+            completed = True
+        finally:
+            # auch bei Ausnahmen (csv.Error, OSError, Ctrl-C): Pool beenden,
+            # Writer per Sentinel stoppen und joinen – sonst hängt der Prozess
+            pool.shutdown(wait=True, cancel_futures=not completed)
+            for job in batch:  # reserviert, aber nie eingereicht
+                job.out_ico.unlink(missing_ok=True)
+            results_q.put(None)
+            writer_thread.join()
+        if not saw_any:
+            sys.exit("Abbruch: Manifest enthält keine Zeilen.")
+        for fut in futures:
+            fut.result()  # unerwartete Worker-Fehler nicht verschlucken
+        successes = stats["successes"]
 
     print("\nZusammenfassung:")
     print(f"  Erfolgreich: {successes}")
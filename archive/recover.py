@@ -13,6 +13,7 @@ Globale Flags:
   --dry-run       -> keine Schreibaktionen (Audit ist ohnehin read-only)
   -v / -vv        -> ausführlichere Logs
   --no-color      -> Farboutput deaktivieren
+  --no-cache      -> desktop.ini-Prüfcache (.recover_cache.json) ignorieren
 
 Exitcodes:
   0 = OK
@@ -22,19 +23,21 @@ Exitcodes:
 
 from __future__ import annotations
 import stat
-from uuid import uuid4
 from pathlib import PureWindowsPath, Path
 import argparse
+import csv
+import functools
 import json
 import os
 import re
 import sys
-import uuid
+import tempfile
 import subprocess
 import shutil
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from collections import defaultdict, Counter
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -42,23 +45,44 @@ from typing import Dict, List, Optional, Tuple
 PICS_DIR = Path("pics")
 ICONS_DIR = Path("icons")
 DESKTOP_INI = "desktop.ini"
+# Cache der desktop.ini-Prüfergebnisse je (Pfad, Größe, mtime)
+INI_CACHE_FILE = Path(".recover_cache.json")
+
+# Kopfzeilen der geschriebenen CSV-Dateien
+RENUM_MAP_HEADER = ("old_png", "new_png", "old_nnn", "new_nnn", "name")
+ICONS_MANIFEST_HEADER = ("source_png", "ico_file", "used_sizes")
 
 # desktop.ini-Soll (Inhalt exakt kontrollieren wir mindestens für IconResource,
 # die restlichen Felder werden auf Existenz geprüft).
 INI_SECTION_SHELL = "[.ShellClassInfo]"
 INI_SECTION_VIEW = "[ViewState]"
 INI_FOLDER_TYPE_LINE = "FolderType=Music"
+# Relativer Icon-Verweis aus einem Motiv-Ordner (..\icons\), einmal berechnet
+ICON_REF_PREFIX = str(PureWindowsPath("..") / ICONS_DIR.name) + "\\"
 
 # Regex für "NNN NAME"
 ID_RE = re.compile(r"^(?P<num>\d{3})\s+(?P<name>.+)$")
+# Wie ID_RE, prüft aber zugleich die Windows-Regeln aus invalid_windows_name
+# (Name ohne verbotene Zeichen, endet nicht auf Punkt/Whitespace; reservierte
+# Basenames können mit führender Nummer nicht auftreten)
+_VALID_ID_RE = re.compile(
+    r'^(?P<num>\d{3})\s+(?P<name>[^<>:"/\\|?*\n]*[^<>:"/\\|?*.\s])$')
+
+# IconResource-Zeile in desktop.ini (Bytes, Wert ohne umgebende Leerzeichen)
+_ICONRES_RE = re.compile(rb"(?im)^[ \t]*iconresource[ \t]*=[ \t]*(.*?)[ \t\r]*$")
+_BACKSLASHES_RE = re.compile(r"\\+")
+
+# Ziffernblöcke für natural_sort_key_name
+_NATKEY_RE = re.compile(r"(\d+)")
 
 # Windows-verbotene Zeichen in Namen (Datei- und Ordnernamen)
 WIN_FORBIDDEN_CHARS = set('<>:"/\\|?*')
-WIN_RESERVED_BASENAMES = {
+_FORBIDDEN_RE = re.compile(r'[<>:"/\\|?*]')
+WIN_RESERVED_BASENAMES = frozenset({
     "CON", "PRN", "AUX", "NUL",
     *(f"COM{i}" for i in range(1, 10)),
     *(f"LPT{i}" for i in range(1, 10)),
-}
+})
 
 # ---------- CLI / Globale Flags ----------
 
@@ -67,6 +91,7 @@ class Cfg:
     verbose: int = 0
     dry_run: bool = False
     use_color: bool = True
+    use_cache: bool = True
 
 
 cfg = Cfg()
@@ -74,36 +99,47 @@ cfg = Cfg()
 # ---------- Utility: Ausgabe ----------
 
 
+_ANSI = {
+    "gray": "\033[90m",
+    "red": "\033[91m",
+    "green": "\033[92m",
+    "yellow": "\033[93m",
+    "blue": "\033[94m",
+    "reset": "\033[0m",
+}
+
+# Ergebnis von supports_color(); None = noch nicht ermittelt
+_COLOR_ENABLED: Optional[bool] = None
+
+
 def supports_color() -> bool:
-    if cfg.use_color is False:
-        return False
-    return sys.stdout.isatty() and os.environ.get("TERM") != "dumb"
+    global _COLOR_ENABLED
+    if _COLOR_ENABLED is None:
+        _COLOR_ENABLED = (cfg.use_color is not False
+                          and sys.stdout.isatty()
+                          and os.environ.get("TERM") != "dumb")
+    return _COLOR_ENABLED
 
 
 def c(text: str, col: str) -> str:
     if not supports_color():
         return text
-    colors = {
-        "gray": "\033[90m",
-        "red": "\033[91m",
-        "green": "\033[92m",
-        "yellow": "\033[93m",
-        "blue": "\033[94m",
-        "reset": "\033[0m",
-    }
-    return f"{colors.get(col, '')}{text}{colors['reset']}"
+    return f"{_ANSI.get(col, '')}{text}{_ANSI['reset']}"
+
+
+_LEVEL_TAGS = {
+    "DEBUG": ("DEBUG", "blue"),
+    "INFO": ("INFO ", "green"),
+    "WARN": ("WARN ", "yellow"),
+    "ERROR": ("ERROR", "red"),
+}
 
 
 def log(msg: str, level: str = "INFO", detail: int = 0):
     if detail > cfg.verbose:
         return
-    tag = {
-        "DEBUG": c("DEBUG", "blue"),
-        "INFO": c("INFO ", "green"),
-        "WARN": c("WARN ", "yellow"),
-        "ERROR": c("ERROR", "red"),
-    }[level]
-    print(f"{tag} {msg}")
+    # nur den benötigten Tag einfärben (nicht alle vier je Aufruf)
+    print(f"{c(*_LEVEL_TAGS[level])} {msg}")
 
 # ---------- Datenstrukturen ----------
 
@@ -120,8 +156,10 @@ class Finding:
 # ---------- Normalisierung / Parsing ----------
 
 
+@functools.lru_cache(maxsize=None)
 def normalize_name(name: str) -> str:
-    # Trimmen, Mehrfachspaces komprimieren, casefold für matching
+    # Trimmen, Mehrfachspaces komprimieren, casefold für matching.
+    # Gecacht: derselbe NAME wird je Lauf für PNG, Ordner und Planung normalisiert.
     n = " ".join(name.strip().split())
     return n.casefold()
 
@@ -130,98 +168,145 @@ def parse_id_from_basename(basename: str) -> Optional[Tuple[str, str]]:
     m = ID_RE.match(basename)
     if not m:
         return None
-    num = m.group("num")
-    name = m.group("name")
-    return num, name
+    return m.group("num", "name")
+
+
+def parse_and_validate(basename: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """
+    parse_id_from_basename + invalid_windows_name in einem Schritt.
+    None bei Schemafehler, sonst (num, name, Fehlercode oder None).
+    """
+    m = _VALID_ID_RE.match(basename)
+    if m:
+        return m.group("num"), m.group("name"), None
+    # Langsamer Pfad nur für fehlerhafte Namen: Fehlerart bestimmen
+    m = ID_RE.match(basename)
+    if not m:
+        return None
+    num, name = m.group("num"), m.group("name")
+    return num, name, invalid_windows_name(f"{num} {name}")
 
 
 def invalid_windows_name(name: str) -> Optional[str]:
-    # Prüfe verbotene Zeichen
-    if any(ch in WIN_FORBIDDEN_CHARS for ch in name):
+    # Prüfe verbotene Zeichen (ein Regex-Scan statt Schleife über Zeichen)
+    if _FORBIDDEN_RE.search(name):
         return "forbidden_char"
     # Prüfe reservierte Basenames (ohne Erweiterung)
-    base = name
-    if "." in base:
-        base = base.split(".")[0]
-    if base.upper() in WIN_RESERVED_BASENAMES:
+    if name.partition(".")[0].upper() in WIN_RESERVED_BASENAMES:
         return "reserved"
-    # Leading/Trailing Dot/Space sind unter Windows problematisch
-    if name.strip() != name or name.endswith(".") or name.startswith("."):
+    # Leading/Trailing Dot/Whitespace sind unter Windows problematisch
+    if name[:1].isspace() or name[-1:].isspace() or name[:1] == "." or name[-1:] == ".":
         return "whitespace_or_dot"
     return None
 
+def _scan_suffix(d: Path, suffix: str) -> List[os.DirEntry]:
+    """
+    Dateien in d mit Endung suffix (case-insensitiv), nach Namen sortiert.
+    Ein scandir-Durchlauf statt glob("*.x") + glob("*.X"), das auf
+    case-insensitiven Dateisystemen Dubletten liefert.
+    """
+    with os.scandir(d) as it:
+        return sorted((e for e in it
+                       if e.is_file(follow_symlinks=False) and e.name.lower().endswith(suffix)),
+                      key=lambda e: e.name)
+
+def _scan_folders() -> List[os.DirEntry]:
+    """
+    Unterordner des Arbeitsverzeichnisses außer pics/icons, nach Namen
+    sortiert. DirEntry.is_dir() nutzt den Typ aus dem Verzeichniseintrag
+    (kein stat je Eintrag wie bei Path.iterdir() + is_dir()).
+    """
+    skip = {PICS_DIR.name, ICONS_DIR.name}
+    with os.scandir(".") as it:
+        return sorted((e for e in it if e.name not in skip and e.is_dir()),
+                      key=lambda e: e.name)
+
+
+def _ico_stems() -> set:
+    """
+    Basisnamen aller .ico in icons/ (unter Windows casefold), mit einem
+    scandir statt exists() je ID. Fehlt icons/, ist die Menge leer.
+    Wie exists(): der ganze Name wird nur unter Windows gefaltet, auf
+    case-sensitiven Dateisystemen zählt "X.ICO" nicht als "X.ico".
+    """
+    fold = str.casefold if os.name == "nt" else str
+    try:
+        names = [fold(e.name) for e in _scan_suffix(ICONS_DIR, ".ico")]
+    except FileNotFoundError:
+        return set()
+    return {n[:-4] for n in names if n.endswith(".ico")}
+
 # ---------- Audit-Logik ----------
 
 
 def audit() -> int:
     findings: List[Finding] = []
 
-    # 0) Grundvoraussetzungen
-    if not PICS_DIR.exists() or not PICS_DIR.is_dir():
+    # 0) Grundvoraussetzungen (beide Ordner mit einem scandir prüfen;
+    # unter Windows ohne Beachtung der Groß-/Kleinschreibung wie is_dir())
+    fold = str.casefold if os.name == "nt" else str
+    with os.scandir(".") as it:
+        top_dirs = {fold(e.name) for e in it if e.is_dir()}
+    missing_basedir = False
+    if fold(PICS_DIR.name) not in top_dirs:
         log(f"Erwarteter Ordner fehlt: ./{PICS_DIR}", "ERROR")
         findings.append(Finding("ERROR", "E_NO_PICS_DIR",
                         str(PICS_DIR), hint="Lege ./pics an."))
-    if not ICONS_DIR.exists() or not ICONS_DIR.is_dir():
+        missing_basedir = True
+    if fold(ICONS_DIR.name) not in top_dirs:
         log(f"Erwarteter Ordner fehlt: ./{ICONS_DIR}", "ERROR")
         findings.append(Finding("ERROR", "E_NO_ICONS_DIR",
                         str(ICONS_DIR), hint="Lege ./icons an."))
+        missing_basedir = True
 
     # Wenn Grundordner fehlen, brechen wir nach Report ab.
-    if any(f.severity == "ERROR" and f.code in {"E_NO_PICS_DIR", "E_NO_ICONS_DIR"} for f in findings):
+    if missing_basedir:
         return finalize(findings)
 
-    # 1) PNGs einlesen
-    png_files = sorted([p for p in PICS_DIR.glob("*.png")] +
-                       [p for p in PICS_DIR.glob("*.PNG")])
+    # 1) PNGs einlesen (ein einziger scandir-Durchlauf, Schemafehler inklusive)
     png_ids: Dict[str, Path] = {}
     png_nums: Dict[int, List[str]] = defaultdict(list)
     png_names_norm: Dict[str, List[str]] = defaultdict(list)
 
-    # Schemafehler in pics
-    for p in sorted(PICS_DIR.iterdir()):
-        if p.is_file() and p.suffix.lower() != ".png":
+    for e in _scan_suffix(PICS_DIR, ".png"):
+        p = Path(e.path)
+        parsed = parse_and_validate(e.name[:-4])
+        if not parsed:
+            findings.append(Finding("ERROR", "E_SCHEMA_PIC", str(
+                p), hint="Erwartet: 'NNN NAME.png'"))
+            log(f"Schemafehler in pics: {e.name}", "ERROR")
             continue
-        if p.is_file() and p.suffix.lower() == ".png":
-            base = p.stem
-            parsed = parse_id_from_basename(base)
-            if not parsed:
-                findings.append(Finding("ERROR", "E_SCHEMA_PIC", str(
-                    p), hint="Erwartet: 'NNN NAME.png'"))
-                log(f"Schemafehler in pics: {p.name}", "ERROR")
-                continue
-            num, name = parsed
-            inv = invalid_windows_name(f"{num} {name}")
-            if inv:
-                findings.append(Finding("ERROR", "E_INVALID_PIC_NAME", str(
-                    p), hint=f"Ungültiger Name ({inv})."))
-                log(f"Ungültiger PNG-Name: {p.name}", "ERROR")
-                continue
-            pic_id = f"{num} {name}"
-            if pic_id in png_ids:
-                findings.append(Finding("ERROR", "E_DUP_PIC_ID", str(
-                    p), actual=pic_id, hint="Doppelter Ident-String in pics."))
-                log(f"Doppelter Ident in pics: {pic_id}", "ERROR")
-            else:
-                png_ids[pic_id] = p
-                try:
-                    nnum = int(num)
-                    png_nums[nnum].append(pic_id)
-                except ValueError:
-                    pass
-                png_names_norm[normalize_name(name)].append(pic_id)
+        num, name, inv = parsed
+        pic_id = f"{num} {name}"
+        if inv:
+            findings.append(Finding("ERROR", "E_INVALID_PIC_NAME", str(
+                p), hint=f"Ungültiger Name ({inv})."))
+            log(f"Ungültiger PNG-Name: {e.name}", "ERROR")
+            continue
+        if pic_id in png_ids:
+            findings.append(Finding("ERROR", "E_DUP_PIC_ID", str(
+                p), actual=pic_id, hint="Doppelter Ident-String in pics."))
+            log(f"Doppelter Ident in pics: {pic_id}", "ERROR")
+        else:
+            png_ids[pic_id] = p
+            try:
+                nnum = int(num)
+                png_nums[nnum].append(pic_id)
+            except ValueError:
+                pass
+            png_names_norm[normalize_name(name)].append(pic_id)
 
     # 2) ICOs einlesen (für Orphans/Schema)
     ico_all: Dict[str, Path] = {}
-    for p in sorted(ICONS_DIR.glob("*.ico")) + sorted(ICONS_DIR.glob("*.ICO")):
-        base = p.stem
-        parsed = parse_id_from_basename(base)
+    for e in _scan_suffix(ICONS_DIR, ".ico"):
+        p = Path(e.path)
+        parsed = parse_and_validate(e.name[:-4])
         if not parsed:
             findings.append(Finding("WARN", "W_SCHEMA_ICON",
                             str(p), hint="Erwartet: 'NNN NAME.ico'"))
             log(f"Schemawarnung in icons: {p.name}", "WARN")
             continue
-        num, name = parsed
-        inv = invalid_windows_name(f"{num} {name}")
+        num, name, inv = parsed
         if inv:
             findings.append(Finding("ERROR", "E_INVALID_ICON_NAME", str(
                 p), hint=f"Ungültiger Name ({inv})."))
@@ -231,30 +316,49 @@ def audit() -> int:
 
     # 3) Ordner (für Orphans/INI)
     folders_all: Dict[str, Path] = {}
-    for p in sorted(Path(".").iterdir()):
-        if not p.is_dir():
-            continue
-        if p.name in {PICS_DIR.name, ICONS_DIR.name}:
-            continue
-        parsed = parse_id_from_basename(p.name)
+    # NAME (normalisiert) -> Ordner-IDs, für die Suche nach falscher Nummer
+    folders_by_name: Dict[str, List[str]] = defaultdict(list)
+    for e in _scan_folders():
+        p = Path(e.path)
+        parsed = parse_and_validate(e.name)
         if not parsed:
             # Ordner außerhalb des Schemas ignorieren
             continue
-        num, name = parsed
-        inv = invalid_windows_name(p.name)
+        num, name, inv = parsed
         if inv:
             findings.append(Finding("ERROR", "E_INVALID_FOLDER_NAME", str(
                 p), hint=f"Ungültiger Name ({inv})."))
             log(f"Ungültiger Ordnername: {p}", "ERROR")
             continue
         folders_all[f"{num} {name}"] = p
+        folders_by_name[normalize_name(name)].append(f"{num} {name}")
 
     # 4) 1:1-Konsistenz je PNG
+    # ICOs sind aus Schritt 2 bekannt -> Set-Lookup statt exists() je PNG
+    # (casefold nur unter Windows, wie das Dateisystem; gleiche Regel unten
+    # beim Orphan-Check, damit sich beide Prüfungen nicht widersprechen)
+    fold = str.casefold if os.name == "nt" else str
+    # Dateinamen statt IDs: "X.ICO" ist auf case-sensitiven Dateisystemen
+    # nicht das erwartete "X.ico"
+    ico_names_f = {fold(p.name) for p in ico_all.values()}
+    # desktop.ini-Prüfungen sind reine, unabhängige Lesezugriffe -> vorab
+    # parallel; Findings entstehen unten in fester Reihenfolge
+    ini_todo = [pic_id for pic_id in png_ids if pic_id in folders_all]
+    ini_results: Dict[str, Optional[tuple]] = {}
+    ini_cache = load_ini_cache()
+    ini_cache_new: Dict[str, list] = {}
+    if ini_todo:
+        with ThreadPoolExecutor(max_workers=min(32, len(ini_todo))) as pool:
+            ini_results = dict(zip(ini_todo, pool.map(
+                lambda pid: _check_ini_if_present(folders_all[pid] / DESKTOP_INI, pid,
+                                                  ini_cache, ini_cache_new),
+                ini_todo)))
+    save_ini_cache(ini_cache_new)
     for pic_id, pic_path in png_ids.items():
         num, name = pic_id.split(" ", 1)
         # ICO vorhanden?
         ico_path = ICONS_DIR / f"{pic_id}.ico"
-        if not ico_path.exists():
+        if fold(ico_path.name) not in ico_names_f:
             findings.append(Finding("ERROR", "E_MISSING_ICON", pic_id, expected=str(
                 ico_path), hint="Icon fehlt zu PNG."))
             log(f"Fehlendes ICO: {ico_path}", "ERROR")
@@ -262,9 +366,12 @@ def audit() -> int:
         folder_path = folders_all.get(pic_id)
         if not folder_path:
             # gibt es evtl. einen Ordner mit gleichem NAME aber falscher Nummer?
-            # (nur Info fürs Audit)
+            # (nur Info fürs Audit; Matching wie in rebuild_folders normalisiert;
+            # gleiche Nummer mit nur anders geschriebenem NAME ist keine falsche
+            # Nummer -> bleibt E_MISSING_FOLDER)
             name_matches = [
-                k for k in folders_all.keys() if k.endswith(f" {name}")]
+                k for k in folders_by_name.get(normalize_name(name), ())
+                if k.split(" ", 1)[0] != num]
             if name_matches:
                 findings.append(Finding("WARN", "W_FOLDER_WRONG_INDEX", pic_id, actual=", ".join(
                     name_matches), hint="Ordner vorhanden, aber mit anderer Nummer."))
@@ -275,22 +382,24 @@ def audit() -> int:
                     Path(".") / pic_id), hint="Ordner fehlt zu PNG."))
                 log(f"Fehlender Ordner: ./{pic_id}/", "ERROR")
         else:
-            # desktop.ini prüfen
+            # desktop.ini prüfen (Ergebnis aus dem Vorab-Lauf)
             ini_file = folder_path / DESKTOP_INI
-            if not ini_file.exists():
+            result = ini_results[pic_id]
+            if result is None:
                 findings.append(Finding("ERROR", "E_MISSING_INI", str(
                     folder_path), expected=DESKTOP_INI, hint="desktop.ini fehlt."))
                 log(f"desktop.ini fehlt: {folder_path}", "ERROR")
             else:
-                ok, exp, act, hint = check_desktop_ini(ini_file, pic_id)
+                ok, exp, act, hint = result
                 if not ok:
                     findings.append(Finding("ERROR", "E_BAD_INI", str(
                         ini_file), expected=exp, actual=act, hint=hint))
                     log(f"Falsche desktop.ini in {folder_path}", "ERROR")
 
     # 5) Orphans: ICO ohne PNG, Ordner ohne PNG
+    png_ids_f = {fold(k) for k in png_ids}
     for ico_id, ico_path in ico_all.items():
-        if ico_id not in png_ids:
+        if fold(ico_id) not in png_ids_f:
             findings.append(Finding("WARN", "W_ORPHAN_ICON", ico_id, actual=str(
                 ico_path), hint="ICO ohne zugehöriges PNG."))
             log(f"Verwaistes ICO: {ico_path}", "WARN")
@@ -324,18 +433,26 @@ def audit() -> int:
                             actual=f"{sorted_nums[0]:03d}", hint="Nummern beginnen nicht bei 000."))
             log(
                 f"Nummernraster: Start ist {sorted_nums[0]:03d}, erwartet 000", "WARN")
-        # Schrittweite prüfen
-        diffs = [b - a for a, b in zip(sorted_nums, sorted_nums[1:])]
+        # Schrittweite und Lücken in einem Durchlauf ermitteln
+        # (Lücken = Rasterpunkte ab der ersten Nummer, die zwischen zwei
+        # vorhandenen Nummern liegen)
+        first = sorted_nums[0]
+        diffs = []
+        missing = []
+        for a, b in zip(sorted_nums, sorted_nums[1:]):
+            diffs.append(b - a)
+            missing.extend(range(a + 10 - (a - first) % 10, b, 10))
+        # liegt die letzte Nummer neben dem Raster, zählt der nächste
+        # Rasterpunkt danach ebenfalls als Lücke
+        last_off = (sorted_nums[-1] - first) % 10
+        if last_off:
+            missing.append(sorted_nums[-1] + 10 - last_off)
         if any(d != 10 for d in diffs):
             findings.append(Finding("WARN", "W_POLICY_STEP", "step", expected="10", actual=",".join(
                 map(str, diffs)), hint="Schrittweite ungleich 10 oder uneinheitlich."))
             log(f"Uneinheitliche Schrittweiten: {diffs}", "WARN")
         # Lücken (implizit über Schritt ≠ 10)
         # Optional: explizite Liste fehlender Nummern
-        missing = []
-        if sorted_nums:
-            target = list(range(sorted_nums[0], sorted_nums[-1] + 10, 10))
-            missing = sorted(set(target) - set(sorted_nums))
         if missing:
             findings.append(Finding("WARN", "W_POLICY_GAPS", "gaps", actual=", ".join(
                 f"{m:03d}" for m in missing), hint="Lücken im 10er-Raster."))
@@ -346,65 +463,82 @@ def audit() -> int:
 
 def check_desktop_ini(ini_path: Path, pic_id: str):
     # Erwarteten Pfad robust konstruieren
-    expected_path = str(PureWindowsPath("..") / "icons" / f"{pic_id}.ico")
     # z.B. ..\icons\000 ACCOUSTIC.ico,0
-    expected_value = expected_path + ",0"
+    expected_value = f"{ICON_REF_PREFIX}{pic_id}.ico,0"
 
-    try:
-        content = ini_path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        content = ini_path.read_text(encoding="cp1252", errors="ignore")
-
-    # letzte IconResource-Zeile nehmen
-    lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
-    icons = [ln for ln in lines if ln.lower().startswith("iconresource=")]
+    # letzte IconResource-Zeile nehmen (ein Regex-Scan über die Rohbytes)
+    icons = _ICONRES_RE.findall(ini_path.read_bytes())
     if not icons:
         return False, expected_value, "<missing IconResource>", "IconResource fehlt."
 
-    raw = icons[-1].split("=", 1)[1].strip().strip('"').strip("'")
-    # Slashes normalisieren und case-insensitiv vergleichen
-    actual = raw.replace("/", "\\")
-    # (optional) doppelte Backslashes zusammenfassen:
-    while "\\\\" in actual:
-        actual = actual.replace("\\\\", "\\")
+    try:
+        raw = icons[-1].decode("utf-8")
+    except UnicodeDecodeError:
+        raw = icons[-1].decode("cp1252", errors="ignore")
+    raw = raw.strip('"').strip("'")
+    # Slashes normalisieren, doppelte Backslashes zusammenfassen
+    # und case-insensitiv vergleichen
+    actual = _BACKSLASHES_RE.sub(r"\\", raw.replace("/", "\\"))
 
     ok = actual.casefold() == expected_value.casefold()
     return ok, expected_value, raw, ("" if ok else "IconResource verweist nicht auf das erwartete ICO.")
 
 
+def _check_ini_if_present(ini_path: Path, pic_id: str,
+                          cache: Dict[str, list], cache_new: Dict[str, list]) -> Optional[tuple]:
+    """
+    check_desktop_ini, aber None statt FileNotFoundError (kein exists() vorab).
+    Unveränderte Dateien (gleiche Größe + mtime) kommen aus dem Cache;
+    alle Ergebnisse dieses Laufs landen in cache_new.
+    """
+    try:
+        st = os.stat(ini_path)
+        key = f"{ini_path}:{st.st_size}:{st.st_mtime_ns}"
+        result = cache.get(key)
+        if result is None:
+            result = list(check_desktop_ini(ini_path, pic_id))
+    except FileNotFoundError:
+        return None
+    cache_new[key] = result
+    return tuple(result)
+
+
+def load_ini_cache() -> Dict[str, list]:
+    if not cfg.use_cache:
+        return {}
+    try:
+        data = json.loads(INI_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_ini_cache(cache: Dict[str, list]) -> None:
+    # nur Einträge des aktuellen Laufs -> Cache wächst nicht unbegrenzt;
+    # --dry-run verändert den geprüften Baum nicht (Cache wird nur gelesen)
+    if not cfg.use_cache or cfg.dry_run:
+        return
+    try:
+        with open(INI_CACHE_FILE, "w", encoding="utf-8") as fh:
+            json.dump(cache, fh, ensure_ascii=False)
+    except OSError as e:
+        log(f"Cache {INI_CACHE_FILE} nicht schreibbar: {e}", "WARN")
+
+
 def natural_sort_key_name(name: str) -> tuple:
     # einfache natürliche Sortierung: casefold + split in Ziffern/Non-Ziffern
-    import itertools
-
-    def chunks(s):
-        buf = ""
-        digit = None
-        for ch in s:
-            if ch.isdigit():
-                if digit is False:
-                    yield buf
-                    buf = ch
-                else:
-                    buf += ch
-                digit = True
-            else:
-                if digit is True:
-                    yield int(buf)
-                    buf = ch
-                else:
-                    buf += ch
-                digit = False
-        if buf:
-            yield int(buf) if digit else buf
-    return tuple((str(x).casefold() if not isinstance(x, int) else x) for x in chunks(name))
+    # (ungerade Indizes sind immer Ziffernblöcke -> Typen je Position stabil)
+    parts = _NATKEY_RE.split(name)
+    return tuple(int(p) if i & 1 else p.casefold() for i, p in enumerate(parts))
 
 
 def ensure_unique_temp_file(target_dir: Path, suffix: str = ".png") -> Path:
-    # erzeugt garantiert nicht kollidierenden Temp-Dateinamen im Zielverzeichnis
-    while True:
-        p = target_dir / f".__renum_tmp__{uuid.uuid4().hex}{suffix}"
-        if not p.exists():
-            return p
+    # reserviert atomar (O_EXCL) eine leere Temp-Datei im Zielverzeichnis;
+    # der Aufrufer ersetzt sie per os.replace
+    fd, path = tempfile.mkstemp(
+        prefix=".__renum_tmp__", suffix=suffix, dir=str(target_dir))
+    os.close(fd)
+    return Path(path)
 
 
 def two_phase_file_renames(mapping: Dict[Path, Path]) -> None:
@@ -415,18 +549,16 @@ def two_phase_file_renames(mapping: Dict[Path, Path]) -> None:
     """
     if not mapping:
         return
-    srcs = list(mapping.keys())
+    replace, rename = os.replace, os.rename
     temps: Dict[Path, Path] = {}
-    # Phase 1: in temp
-    for src in srcs:
+    # Phase 1: in temp (reservierte leere Temp-Datei überschreiben)
+    for src in mapping:
         tmp = ensure_unique_temp_file(src.parent, suffix=src.suffix)
-        src.rename(tmp)
+        replace(src, tmp)
         temps[src] = tmp
-    # Phase 2: temp -> final
-    for src in srcs:
-        tmp = temps[src]
-        dst = mapping[src]
-        tmp.rename(dst)
+    # Phase 2: temp -> final (rename: unter Windows kein stilles Überschreiben)
+    for src, dst in mapping.items():
+        rename(temps[src], dst)
 
 
 def find_im_binary() -> list[str]:
@@ -440,16 +572,6 @@ def find_im_binary() -> list[str]:
     return []
 
 
-def ts_token() -> str:
-    return datetime.now().strftime("%Y%m%d-%H%M%S")
-
-
-def make_tmpdir(base: Path) -> Path:
-    d = base / f".recover_tmp-{ts_token()}"
-    d.mkdir(parents=True, exist_ok=False)
-    return d
-
-
 def run_im(cmd: list[str]) -> tuple[bool, str]:
     """Führt ein IM-Kommando aus, gibt (ok, stderr_text) zurück."""
     try:
@@ -460,68 +582,130 @@ def run_im(cmd: list[str]) -> tuple[bool, str]:
         return False, e.stderr.decode(errors="ignore")[:1200]
 
 
-def im_norm_command(im_bin: list[str], src: Path, dst: Path, size: int) -> list[str]:
+# Einzelaufrufe laufen parallel (je Quelle ein Thread) -> IM selbst
+# single-threaded halten, sonst konkurrieren N x Kerne-Threads
+IM_LIMITS = ["-limit", "thread", "1"]
+
+
+def im_norm_ops(size: int) -> list[str]:
     """
     Normierung pro Frame:
       - cover-Resize (^), zentriert
       - weißer Hintergrund, Alpha entfernt
       - sRGB, 8-Bit, TrueColor, keine Palette, strip
     """
-    return (
-        im_bin
-        + [
-            str(src),
-            "-colorspace", "sRGB",
-            "-resize", f"{size}x{size}^",
-            "-gravity", "center",
-            "-extent", f"{size}x{size}",
-            "-background", "white",
-            "-flatten",
-            "-depth", "8",
-            "-alpha", "off",
-            "-type", "TrueColor",
-            "-define", "png:color-type=2",
-            "-strip",
-            str(dst),
-        ]
-    )
-
-
-def im_ico_command(im_bin: list[str], inputs: list[Path], out_ico: Path, icon_format: Optional[str]) -> list[str]:
-    cmd = im_bin + [str(p) for p in inputs]
+    return [
+        "-resize", f"{size}x{size}^",
+        "-gravity", "center",
+        "-extent", f"{size}x{size}",
+        "-background", "white",
+        "-flatten",
+        "-depth", "8",
+        "-alpha", "off",
+        "-type", "TrueColor",
+        "-define", "png:color-type=2",
+        "-strip",
+    ]
+
+
+def im_ico_ops(icon_format: Optional[str]) -> list[str]:
     # Vereinheitlichung & optionales Frame-Format
+    ops = []
     if icon_format in {"bmp", "png"}:
-        cmd += ["-define", f"icon:format={icon_format}"]
-    cmd += ["-colorspace", "sRGB", "-depth", "8", "-alpha",
-            "off", "-type", "TrueColor", str(out_ico)]
-    return cmd
+        ops += ["-define", f"icon:format={icon_format}"]
+    ops += ["-colorspace", "sRGB", "-depth", "8", "-alpha",
+            "off", "-type", "TrueColor"]
+    return ops
+
+
+def im_frames_ops(sizes: list[int], icon_format: Optional[str]) -> list[str]:
+    """
+    Operationen zwischen Quelle und ICO-Ziel: je Größe ein normierter Klon
+    ( -clone 0 ... ), danach Original verwerfen. Die Frames bleiben im
+    Speicher, es entstehen keine Zwischen-PNGs.
+    """
+    ops = ["-colorspace", "sRGB"]
+    for size in sizes:
+        ops += ["(", "-clone", "0", *im_norm_ops(size), ")"]
+    return ops + ["-delete", "0", *im_ico_ops(icon_format)]
+
+
+def im_build_ico_command(im_bin: list[str], src: Path, out_ico: Path, sizes: list[int],
+                         icon_format: Optional[str]) -> list[str]:
+    """EIN IM-Aufruf: PNG -> normierte Frames -> ICO."""
+    return im_bin + IM_LIMITS + [str(src), *im_frames_ops(sizes, icon_format), str(out_ico)]
+
+
+def im_script_line(src: Path, out_ico: Path, sizes: list[int], icon_format: Optional[str],
+                   ack: str) -> str:
+    """
+    Wie im_build_ico_command als Zeile für 'magick -script', zusätzlich
+    Quittung 'ack' auf stdout nach dem Schreiben und Bildliste leeren.
+    Pfade mit '/' und in Anführungszeichen (Windows-Namen enthalten kein '"').
+    """
+    return (f'-read "{src.as_posix()}" {" ".join(im_frames_ops(sizes, icon_format))} '
+            f'-write "{out_ico.as_posix()}" -print "{ack}\\n" -delete 0--1')
 
 
 def ensure_unique_temp_dir(parent: Path) -> Path:
-    while True:
-        p = parent / f".__ren_dir_tmp__{uuid4().hex}"
-        if not p.exists():
-            return p
+    # eindeutiges Verzeichnis atomar per mkdtemp reservieren; der Aufrufer
+    # verschiebt in dieses Verzeichnis hinein (Windows benennt nicht auf ein
+    # vorhandenes Ziel um) und entfernt es danach
+    return Path(tempfile.mkdtemp(prefix=".__ren_dir_tmp__", dir=str(parent)))
 
 
 def two_phase_dir_renames(mapping: Dict[Path, Path]) -> None:
     """
     Kollisionsfreie Ordner-Umbenennungen:
-      1) alle src -> eindeutige Temp-Verzeichnisse
-      2) alle temp -> final dst
+      1) alle src -> in ein eigenes, reserviertes Temp-Verzeichnis
+      2) alle temp -> final dst, Temp-Verzeichnis entfernen
     """
     if not mapping:
         return
+    rename = os.rename
     temps: Dict[Path, Path] = {}
-    # Phase 1: src -> temp
-    for src in mapping.keys():
-        tmp = ensure_unique_temp_dir(src.parent)
-        src.rename(tmp)
+    # Phase 1: src -> temp/<name> (Reservierung bleibt bis Phase 2 bestehen)
+    for src in mapping:
+        tmp = ensure_unique_temp_dir(src.parent) / src.name
+        rename(src, tmp)
         temps[src] = tmp
     # Phase 2: temp -> dst
     for src, dst in mapping.items():
-        tmp = temps[src]
-        tmp.rename(dst)
+        rename(temps[src], dst)
+        temps[src].parent.rmdir()
+
+
+# Dateiattribute unter Windows direkt per WinAPI setzen (statt attrib.exe je
+# Aufruf zu starten); sonst bleibt es beim attrib-Fallback.
+FILE_ATTRIBUTE_READONLY = 0x1
+FILE_ATTRIBUTE_HIDDEN = 0x2
+FILE_ATTRIBUTE_SYSTEM = 0x4
+_INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _GetFileAttributesW = _kernel32.GetFileAttributesW
+    _GetFileAttributesW.argtypes = [wintypes.LPCWSTR]
+    _GetFileAttributesW.restype = wintypes.DWORD
+    _SetFileAttributesW = _kernel32.SetFileAttributesW
+    _SetFileAttributesW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+    _SetFileAttributesW.restype = wintypes.BOOL
+else:
+    _GetFileAttributesW = _SetFileAttributesW = None
+
+
+def _win_update_attrs(path: Path, set_bits: int = 0, clear_bits: int = 0) -> bool:
+    """Attribut-Bits setzen/löschen (wie attrib +X/-X). False = nicht möglich."""
+    if _SetFileAttributesW is None:
+        return False
+    attrs = _GetFileAttributesW(str(path))
+    if attrs == _INVALID_FILE_ATTRIBUTES:
+        return False
+    new = (attrs | set_bits) & ~clear_bits
+    return new == attrs or bool(_SetFileAttributesW(str(path), new))
 
 
 def _clear_readonly(path: Path):
@@ -530,6 +714,8 @@ def _clear_readonly(path: Path):
         os.chmod(path, stat.S_IWRITE)
     except Exception:
         pass
+    if _win_update_attrs(path, clear_bits=FILE_ATTRIBUTE_READONLY):
+        return
     # Fallback: attrib
     try:
         subprocess.run(["attrib", "-R", str(path)], check=False,
@@ -539,6 +725,8 @@ def _clear_readonly(path: Path):
 
 
 def _set_hidden_system(path: Path):
+    if _win_update_attrs(path, set_bits=FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_SYSTEM):
+        return
     try:
         subprocess.run(["attrib", "+H", "+S", str(path)], check=False,
                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -548,6 +736,8 @@ def _set_hidden_system(path: Path):
 
 def _mark_folder_customized(folder: Path):
     # Explorer beachtet desktop.ini zuverlässiger, wenn der Ordner ReadOnly ist
+    if _win_update_attrs(folder, set_bits=FILE_ATTRIBUTE_READONLY):
+        return
     try:
         subprocess.run(["attrib", "+R", str(folder)], check=False,
                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -567,7 +757,7 @@ def write_desktop_ini(folder: Path, pic_id: str) -> None:
     ini_path = folder / "desktop.ini"
     content = (
         "[.ShellClassInfo]\n"
-        f"IconResource=..\\icons\\{pic_id}.ico,0\n"
+        f"IconResource={ICON_REF_PREFIX}{pic_id}.ico,0\n"
         "[ViewState]\n"
         "Mode=\n"
         "Vid=\n"
@@ -596,6 +786,52 @@ def write_desktop_ini(folder: Path, pic_id: str) -> None:
     _mark_folder_customized(folder)
 
 
+@functools.lru_cache(maxsize=None)
+def _umask() -> int:
+    """Aktuelle umask (nur per Setzen+Zurücksetzen lesbar, daher einmal gecacht)."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+@contextmanager
+def atomic_write(path: Path, newline: Optional[str] = None):
+    """
+    Textdatei (UTF-8) über eine Temp-Datei im selben Ordner schreiben und erst
+    nach vollständigem Schreiben per os.replace einsetzen. Bei Fehlern bleibt
+    die alte Datei unverändert, die Temp-Datei wird entfernt.
+    Rechte wie bei open(): Modus der bestehenden Datei, sonst 0o666 & ~umask.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline=newline) as fh:
+            yield fh
+        # mkstemp legt 0600 an, os.replace übernähme das
+        try:
+            mode = stat.S_IMODE(path.stat().st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_umask()
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_csv(path: Path, header: Tuple[str, ...], rows: List[tuple]):
+    """
+    CSV atomar schreiben: Kopfzeile + alle Zeilen in einem Rutsch.
+    Kopfzeile mit Standard-Quoting (Format wie bisher), Datenfelder alle gequotet.
+    """
+    with atomic_write(path, newline="") as fh:
+        csv.writer(fh, lineterminator="\n").writerow(header)
+        csv.writer(fh, quoting=csv.QUOTE_ALL, lineterminator="\n").writerows(rows)
+
+
 def rmtree_force(path: Path):
     """Ordner rekursiv löschen; ReadOnly-Attribute vorher entfernen."""
     def onerror(func, p, exc_info):
@@ -628,18 +864,15 @@ def renum_pics() -> int:
     # 1) PNGs parsen (Schema prüfen)
     items: List[Tuple[int, str, Path]] = []  # (old_num, NAME_original, path)
     seen_ids = set()
-    for p in sorted(PICS_DIR.iterdir()):
-        if not p.is_file() or p.suffix.lower() != ".png":
-            continue
-        base = p.stem
-        parsed = parse_id_from_basename(base)
+    for e in _scan_suffix(PICS_DIR, ".png"):
+        p = Path(e.path)
+        parsed = parse_and_validate(e.name[:-4])
         if not parsed:
             findings.append(Finding("ERROR", "E_SCHEMA_PIC",
                             str(p), hint="Erwartet: 'NNN NAME.png'"))
-            log(f"Schemafehler in pics: {p.name}", "ERROR")
+            log(f"Schemafehler in pics: {e.name}", "ERROR")
             continue
-        num, name = parsed
-        inv = invalid_windows_name(f"{num} {name}")
+        num, name, inv = parsed
         if inv:
             findings.append(Finding("ERROR", "E_INVALID_PIC_NAME",
                             str(p), hint=f"Ungültiger Name ({inv})."))
@@ -696,25 +929,27 @@ def renum_pics() -> int:
         new_path = p.with_name(f"{new_base}.png")
         rows_for_csv.append(
             (f"{old_base}.png", f"{new_base}.png", f"{onum:03d}", f"{nnum:03d}", name))
-        if old_path.resolve() != new_path.resolve():
+        # gleicher Elternordner (with_name) -> Namensvergleich genügt
+        if old_path.name != new_path.name:
             renames[old_path] = new_path
 
     if not renames:
         log("Renum: Keine Änderungen erforderlich (bereits im 10er-Raster).", "INFO")
         # Trotzdem Mapping-Datei schreiben? Ja, hilfreich – außer im Dry-Run.
         if not cfg.dry_run:
-            with open("renum_map.csv", "w", encoding="utf-8", newline="") as fh:
-                fh.write("old_png,new_png,old_nnn,new_nnn,name\n")
-                for r in rows_for_csv:
-                    fh.write(",".join(f'"{x}"' for x in r) + "\n")
+            write_csv(Path("renum_map.csv"), RENUM_MAP_HEADER, rows_for_csv)
         return 0
 
     # 5) Zielkollisionen prüfen (existierende Dateien, die keine Quellen sind)
-    dests = set(renames.values())
-    srcs = set(renames.keys())
+    # Ein scandir statt exists() je Ziel; casefold, da Windows-Dateisysteme
+    # Groß-/Kleinschreibung nicht unterscheiden
+    with os.scandir(PICS_DIR) as it:
+        existing_names = {e.name.casefold() for e in it}
+    src_names = {src.name.casefold() for src in renames}
     conflicts = []
-    for dst in dests:
-        if dst.exists() and dst not in srcs:
+    for dst in renames.values():
+        n = dst.name.casefold()
+        if n in existing_names and n not in src_names:
             conflicts.append(str(dst))
     if conflicts:
         log(f"Renum: Zielkollision(en) vorhanden, Abbruch:\n  " +
@@ -736,10 +971,7 @@ def renum_pics() -> int:
 
     # 7) renum_map.csv schreiben
     try:
-        with open("renum_map.csv", "w", encoding="utf-8", newline="") as fh:
-            fh.write("old_png,new_png,old_nnn,new_nnn,name\n")
-            for r in rows_for_csv:
-                fh.write(",".join(f'"{x}"' for x in r) + "\n")
+        write_csv(Path("renum_map.csv"), RENUM_MAP_HEADER, rows_for_csv)
     except Exception as e:
         log(f"Fehler beim Schreiben von renum_map.csv: {e}", "ERROR")
         return 2
@@ -762,6 +994,76 @@ def renum_pics() -> int:
     return 0
 
 
+def _build_one(ident: str, src_png: Path, icons_dir: Path,
+               im_bin: list[str], icon_format: Optional[str],
+               sizes: list[int]) -> tuple[bool, str]:
+    """
+    Baut ein ICO aus einem PNG (ein IM-Aufruf, ICO in Temp-Datei, dann
+    Umbenennen). Gibt (ok, Fehlertext) zurück.
+    """
+    out_ico = icons_dir / f"{ident}.ico"
+    tmp_out = icons_dir / f".__tmp__{ident}.ico"
+    cmd = im_build_ico_command(im_bin, src_png, tmp_out, sizes, icon_format)
+    if cfg.verbose >= 2:
+        log("IM> " + " ".join(cmd), "DEBUG")
+    ok, err = run_im(cmd)
+    if not ok or not tmp_out.exists():
+        return False, f"Fehler beim ICO-Build {ident}:\n{err}"
+    # Atomar ersetzen (hier nur Umbenennen, da icons leer/neu ist)
+    try:
+        tmp_out.replace(out_ico)
+    except Exception as e:
+        return False, f"Konnte {tmp_out.name} nicht nach {out_ico.name} verschieben: {e}"
+    return True, ""
+
+
+def _build_all_scripted(im_bin: list[str], sources: list[tuple[str, Path]],
+                        icons_dir: Path, icon_format: Optional[str],
+                        sizes: list[int]) -> set[str]:
+    """
+    IM7: alle ICOs in EINER magick-Sitzung bauen (magick -script), statt je
+    Quelle Prozessstart + Coder-Initialisierung zu bezahlen.
+    Jede Zeile quittiert ihr fertig geschriebenes ICO mit ihrer Zeilennummer
+    auf stdout. Gibt die quittierten Idents zurück; bricht das Skript ab, baut
+    der Aufrufer nur den Rest einzeln (_build_one).
+    """
+    tmp_outs = {ident: icons_dir / f".__tmp__{ident}.ico" for ident, _ in sources}
+    fd, script_name = tempfile.mkstemp(prefix=".recover_", suffix=".mgk")
+    script = Path(script_name)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(im_script_line(src, tmp_outs[ident], sizes, icon_format, str(i))
+                           for i, (ident, src) in enumerate(sources)) + "\n")
+    cmd = im_bin + ["-script", str(script)]
+    if cfg.verbose >= 2:
+        log("IM> " + " ".join(cmd), "DEBUG")
+    try:
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finally:
+        try:
+            script.unlink()
+        except Exception:
+            pass
+    acked = {int(tok) for tok in res.stdout.split() if tok.isdigit()}
+
+    built: set[str] = set()
+    for i, (ident, _src) in enumerate(sources):
+        tmp_out = tmp_outs[ident]
+        try:
+            if i in acked:
+                tmp_out.replace(icons_dir / f"{ident}.ico")
+                built.add(ident)
+            elif tmp_out.exists():
+                # nicht quittiert -> evtl. halb geschrieben, verwerfen
+                tmp_out.unlink()
+        except Exception:
+            pass
+    if res.returncode != 0:
+        err = res.stderr.decode(errors="ignore")[:1200]
+        log(f"IM-Skript abgebrochen ({len(built)}/{len(sources)} fertig), "
+            f"baue den Rest einzeln:\n{err}", "WARN")
+    return built
+
+
 def build_icons(icon_format: Optional[str]) -> int:
     """
     Baut ALLE .ico aus den aktuellen pics/NNN NAME.png neu.
@@ -783,18 +1085,17 @@ def build_icons(icon_format: Optional[str]) -> int:
 
     # PNG-Quellen einsammeln
     sources: list[tuple[str, Path]] = []
-    for p in sorted(PICS_DIR.iterdir()):
-        if p.is_file() and p.suffix.lower() == ".png":
-            parsed = parse_id_from_basename(p.stem)
-            if not parsed:
-                log(f"Übersprungen (Schemafehler): {p.name}", "WARN")
-                continue
-            num, name = parsed
-            invalid = invalid_windows_name(f"{num} {name}")
-            if invalid:
-                log(f"Übersprungen (ungültiger Name): {p.name}", "WARN")
-                continue
-            sources.append((f"{num} {name}", p))
+    for e in _scan_suffix(PICS_DIR, ".png"):
+        parsed = parse_and_validate(e.name[:-4])
+        if not parsed:
+            log(f"Übersprungen (Schemafehler): {e.name}", "WARN")
+            continue
+        num, name, invalid = parsed
+        ident = f"{num} {name}"
+        if invalid:
+            log(f"Übersprungen (ungültiger Name): {e.name}", "WARN")
+            continue
+        sources.append((ident, Path(e.path)))
 
     if not sources:
         log("Keine PNG-Quellen gefunden.", "WARN")
@@ -822,16 +1123,6 @@ def build_icons(icon_format: Optional[str]) -> int:
             log(f"icons-Ordner konnte nicht neu erstellt werden: {e}", "ERROR")
             return 2
 
-    # Arbeitsverzeichnis für Normalisate
-    tmp_root: Optional[Path] = None
-    if not cfg.dry_run:
-        try:
-            tmp_root = make_tmpdir(Path("."))
-        except Exception as e:
-            log(
-                f"Temporäres Arbeitsverzeichnis konnte nicht erstellt werden: {e}", "ERROR")
-            return 2
-
     used_sizes = [64, 128, 256]  # Aufsteigend für ICO
     # (source_png, ico_file, used_sizes)
     manifest_rows: list[tuple[str, str, str]] = []
@@ -839,107 +1130,47 @@ def build_icons(icon_format: Optional[str]) -> int:
     errors = 0
     built = 0
 
-    for ident, src_png in sources:
-        out_ico = ICONS_DIR / f"{ident}.ico"
-        if cfg.dry_run:
+    if cfg.dry_run:
+        for ident, src_png in sources:
+            out_ico = ICONS_DIR / f"{ident}.ico"
             log(f"[PLAN] Build ICO: {src_png}  →  {out_ico}", "INFO")
             if cfg.verbose >= 2:
-                for s in used_sizes:
-                    tmp_target = Path("<tmp>") / \
-                        f"{src_png.stem}_{s}_white.png"
-                    cmd = im_norm_command(im_bin, src_png, tmp_target, s)
-                    log("      " + " ".join(cmd), "DEBUG")
-                cmd_ico = im_ico_command(
-                    im_bin,
-                    [Path("<tmp>") /
-                     f"{src_png.stem}_{s}_white.png" for s in used_sizes],
-                    out_ico,
-                    icon_format,
-                )
-                log("      " + " ".join(cmd_ico), "DEBUG")
+                cmd = im_build_ico_command(
+                    im_bin, src_png, out_ico, used_sizes, icon_format)
+                log("      " + " ".join(cmd), "DEBUG")
             manifest_rows.append(
                 (str(src_png), str(out_ico), ";".join(map(str, used_sizes))))
-            continue
-
-        # Reale Ausführung
-        assert tmp_root is not None
-        tmp_files: list[Path] = []
-        ok_all = True
-
-        try:
-            # 1) Norm-Frames erzeugen
-            for s in used_sizes:
-                dst = tmp_root / f"{src_png.stem}_{s}_white.png"
-                cmd = im_norm_command(im_bin, src_png, dst, s)
-                if cfg.verbose >= 2:
-                    log("IM> " + " ".join(cmd), "DEBUG")
-                ok, err = run_im(cmd)
-                if not ok or not dst.exists():
-                    log(f"Fehler bei Normierung {src_png.name} @ {s}px:\n{err}", "ERROR")
-                    ok_all = False
-                    break
-                tmp_files.append(dst)
-
-            # 2) ICO bauen (nur wenn Normierung ok)
+    else:
+        # Reale Ausführung: Quellen sind unabhängig -> parallel (IM-Prozesse
+        # laufen außerhalb des GIL, Threads genügen)
+        # IM7 zuerst per Skript in einer Sitzung (IM6 kennt -script nicht)
+        results: Dict[str, tuple[bool, str]] = {}
+        if os.path.basename(im_bin[0]).lower().startswith("magick"):
+            results = {ident: (True, "") for ident in _build_all_scripted(
+                im_bin, sources, ICONS_DIR, icon_format, used_sizes)}
+        pending = [src for src in sources if src[0] not in results]
+        if pending:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                results.update(zip((ident for ident, _ in pending), pool.map(
+                    lambda src: _build_one(src[0], src[1], ICONS_DIR,
+                                           im_bin, icon_format, used_sizes),
+                    pending)))
+        for ident, src_png in sources:
+            ok_all, err = results[ident]
+            out_ico = ICONS_DIR / f"{ident}.ico"
             if ok_all:
-                tmp_out = ICONS_DIR / f".__tmp__{ident}.ico"
-                cmd_ico = im_ico_command(
-                    im_bin, tmp_files, tmp_out, icon_format)
-                if cfg.verbose >= 2:
-                    log("IM> " + " ".join(cmd_ico), "DEBUG")
-                ok, err = run_im(cmd_ico)
-                if not ok or not tmp_out.exists():
-                    log(f"Fehler beim ICO-Build {ident}:\n{err}", "ERROR")
-                    ok_all = False
-                else:
-                    # Atomar ersetzen (hier nur Umbenennen, da icons leer/neu ist)
-                    try:
-                        if out_ico.exists():
-                            out_ico.unlink()
-                        tmp_out.replace(out_ico)
-                    except Exception as e:
-                        log(f"Konnte {tmp_out.name} nicht nach {out_ico.name} verschieben: {e}", "ERROR")
-                        ok_all = False
-        finally:
-            # 3) Cleanup der Norm-Frames (best effort)
-            if tmp_files:
-                for f in tmp_files:
-                    try:
-                        if f.exists():
-                            f.unlink()
-                    except Exception:
-                        pass
-
-        if ok_all:
-            built += 1
-            manifest_rows.append(
-                (str(src_png), str(out_ico), ";".join(map(str, used_sizes))))
-            log(f"[OK] {src_png.name} → {out_ico.name}  (Größen: {';'.join(map(str, used_sizes))})", "INFO")
-        else:
-            errors += 1
-
-    # Globales Cleanup
-    if tmp_root and tmp_root.exists():
-        try:
-            tmp_root.rmdir()
-        except OSError:
-            try:
-                for child in tmp_root.glob("*"):
-                    try:
-                        child.unlink()
-                    except Exception:
-                        pass
-                tmp_root.rmdir()
-            except Exception:
-                pass
+                built += 1
+                manifest_rows.append(
+                    (str(src_png), str(out_ico), ";".join(map(str, used_sizes))))
+                log(f"[OK] {src_png.name} → {out_ico.name}  (Größen: {';'.join(map(str, used_sizes))})", "INFO")
+            else:
+                log(err, "ERROR")
+                errors += 1
 
     # Manifest schreiben (außer im Dry-Run)
     if not cfg.dry_run:
         try:
-            with open("icons_manifest.csv", "w", encoding="utf-8", newline="") as fh:
-                fh.write("source_png,ico_file,used_sizes\n")
-                for r in manifest_rows:
-                    fh.write(",".join(f'"{x}"' for x in r) + "\n")
+            write_csv(Path("icons_manifest.csv"), ICONS_MANIFEST_HEADER, manifest_rows)
         except Exception as e:
             log(f"Fehler beim Schreiben von icons_manifest.csv: {e}", "ERROR")
             errors += 1
@@ -978,15 +1209,13 @@ def rebuild_folders() -> int:
     # --- PNGs einlesen (Quelle der Wahrheit) ---
     pics: Dict[str, Tuple[str, str, Path]] = {}  # id -> (num, name, path)
     name_norm_to_id: Dict[str, str] = {}
-    for p in sorted(PICS_DIR.iterdir()):
-        if not p.is_file() or p.suffix.lower() != ".png":
-            continue
-        parsed = parse_id_from_basename(p.stem)
+    for e in _scan_suffix(PICS_DIR, ".png"):
+        p = Path(e.path)
+        parsed = parse_and_validate(e.name[:-4])
         if not parsed:
             log(f"Übersprungen (Schemafehler): {p.name}", "WARN")
             continue
-        num, name = parsed
-        inv = invalid_windows_name(f"{num} {name}")
+        num, name, inv = parsed
         if inv:
             log(f"Übersprungen (ungültiger Name): {p.name}", "WARN")
             continue
@@ -1007,12 +1236,9 @@ def rebuild_folders() -> int:
     # --- vorhandene Ordner scannen ---
     folders_by_id: Dict[str, Path] = {}
     folders_by_name_norm: Dict[str, List[str]] = defaultdict(list)
-    for d in sorted(Path(".").iterdir()):
-        if not d.is_dir():
-            continue
-        if d.name in {PICS_DIR.name, ICONS_DIR.name}:
-            continue
-        parsed = parse_id_from_basename(d.name)
+    for e in _scan_folders():
+        d = Path(e.path)
+        parsed = parse_id_from_basename(e.name)
         if not parsed:
             # Fremdordner ignorieren
             continue
@@ -1020,6 +1246,9 @@ def rebuild_folders() -> int:
         ident = f"{num} {name}"
         folders_by_id[ident] = d
         folders_by_name_norm[normalize_name(name)].append(ident)
+    # Kandidaten je NAME einmalig nach Nummer sortieren (stabile Wahl: kleinste zuerst)
+    for fids in folders_by_name_norm.values():
+        fids.sort(key=lambda fid: int(fid.split(" ", 1)[0]))
 
     # --- Plan aufstellen ---
     rename_map: Dict[Path, Path] = {}
@@ -1043,12 +1272,9 @@ def rebuild_folders() -> int:
             continue
 
         # 2) Ordner mit gleichem NAME (andere Nummer) vorhanden?
-        candidates = [fid for fid in folders_by_name_norm.get(
-            name_norm, []) if fid not in used_folder_ids]
-        if candidates:
-            # stabil wählen: kleinste Nummer zuerst
-            candidates.sort(key=lambda fid: int(fid.split(" ", 1)[0]))
-            chosen_id = candidates[0]
+        chosen_id = next((fid for fid in folders_by_name_norm.get(name_norm, ())
+                          if fid not in used_folder_ids), None)
+        if chosen_id is not None:
             src = folders_by_id[chosen_id]
             used_folder_ids.add(chosen_id)
 
@@ -1085,6 +1311,10 @@ def rebuild_folders() -> int:
             log(f"[ORPHAN] Ordner ohne PNG: {fpath}", "WARN")
             warnings += 1
 
+    # Vorhandene ICOs einmal einlesen (für die Fehlt-Warnungen unten)
+    fold = str.casefold if os.name == "nt" else str
+    ico_stems = _ico_stems()
+
     # 5) Dry-run? -> Plan anzeigen und abbrechen
     if cfg.dry_run:
         if rename_map:
@@ -1095,17 +1325,14 @@ def rebuild_folders() -> int:
             log("Geplante Ordner-Neuanlagen:", "INFO")
             for d in create_list:
                 log(f"  {d}", "INFO")
-        # desktop.ini-Plan
+        # desktop.ini-Plan und Icon-Prüfung (nur Warnung) in einem Durchlauf
         if cfg.verbose:
             log("desktop.ini wird für folgende IDs neu geschrieben:", "INFO")
-            for pid in ini_targets:
-                log(f"  {pid}  →  ..\\icons\\{pid}.ico,0", "INFO")
-
-        # Icons prüfen (nur Warnung, falls fehlen)
         for pid in ini_targets:
-            ico = ICONS_DIR / f"{pid}.ico"
-            if not ico.exists():
-                log(f"[WARN] Zu {pid} fehlt (noch) {ico}", "WARN")
+            if cfg.verbose:
+                log(f"  {pid}  →  {ICON_REF_PREFIX}{pid}.ico,0", "INFO")
+            if fold(pid) not in ico_stems:
+                log(f"[WARN] Zu {pid} fehlt (noch) {ICONS_DIR / (pid + '.ico')}", "WARN")
                 warnings += 1
 
         # Dry-run Exitcode
@@ -1145,9 +1372,8 @@ def rebuild_folders() -> int:
                 f"desktop.ini konnte nicht geschrieben werden: {folder} -> {e}", "ERROR")
             errors += 1
         # fehlendes ICO nur warnen
-        ico = ICONS_DIR / f"{pid}.ico"
-        if not ico.exists():
-            log(f"[WARN] Zu {pid} fehlt (noch) {ico}", "WARN")
+        if fold(pid) not in ico_stems:
+            log(f"[WARN] Zu {pid} fehlt (noch) {ICONS_DIR / (pid + '.ico')}", "WARN")
             warnings += 1
 
     # 7) Abschluss-Audit (nur nach echtem Lauf)
@@ -1162,17 +1388,23 @@ def rebuild_folders() -> int:
 
 def finalize(findings: List[Finding]) -> int:
     counts = Counter(f.severity for f in findings)
-    # Report-Datei schreiben
-    report = {
-        "summary": {
-            "info": counts.get("INFO", 0),
-            "warn": counts.get("WARN", 0),
-            "error": counts.get("ERROR", 0),
-        },
-        "findings": [asdict(f) for f in findings],
+    # Report-Datei schreiben: gestreamt, ein Finding je Zeile (lesbar, ohne
+    # Zwischenliste aus asdict-Kopien; Finding-Felder sind flach -> vars genügt)
+    summary = {
+        "info": counts.get("INFO", 0),
+        "warn": counts.get("WARN", 0),
+        "error": counts.get("ERROR", 0),
     }
-    with open("audit_report.json", "w", encoding="utf-8") as fh:
-        json.dump(report, fh, ensure_ascii=False, indent=2)
+    with atomic_write(Path("audit_report.json")) as fh:
+        fh.write('{"summary": ')
+        json.dump(summary, fh, ensure_ascii=False)
+        fh.write(',\n "findings": [')
+        sep = "\n  "
+        for f in findings:
+            fh.write(sep)
+            json.dump(vars(f), fh, ensure_ascii=False)
+            sep = ",\n  "
+        fh.write("\n]}\n" if findings else "]}\n")
 
     # Konsole zusammenfassen
     if findings:
@@ -1201,6 +1433,8 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
                    help="Mehr Ausgaben. -v oder -vv.")
     p.add_argument("--no-color", action="store_true",
                    help="Farbausgabe deaktivieren.")
+    p.add_argument("--no-cache", action="store_true",
+                   help=f"desktop.ini immer neu prüfen ({INI_CACHE_FILE} weder lesen noch schreiben).")
 
     # Modi (mutually exclusive)
     g = p.add_mutually_exclusive_group()
@@ -1217,10 +1451,13 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
 
 
 def main(argv: List[str]) -> int:
+    global _COLOR_ENABLED
     args = parse_args(argv)
     cfg.verbose = int(args.verbose or 0)
     cfg.dry_run = bool(args.dry_run)
     cfg.use_color = not bool(args.no_color)
+    _COLOR_ENABLED = None  # neu ermitteln
+    cfg.use_cache = not bool(args.no_cache)
 
     if args.renum_pics:
         return renum_pics()
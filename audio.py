@@ -2,11 +2,90 @@
 """audio.py – Zentrale Audiooperationen (Endformat: FLAC, Quelle: ".")"""
 
 import argparse
+import itertools
 import json
+import multiprocessing as mp
+import os
 import sys
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 from lib import flac, config
-from lib.utils import get_timestamp, find_audio_files, collect_audio_stats, mirror_folder
+from lib.utils import get_timestamp, find_audio_files, iter_audio_files, collect_audio_stats, mirror_folder
+
+try:
+    # optional: schneller C-Encoder für tagexport; sonst stdlib json (gleiche Ausgabe)
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _ndjson_line(rec: dict) -> bytes:
+    """Kompakte NDJSON-Zeile (UTF-8, ohne ASCII-Escaping) als Bytes."""
+    if orjson is not None:
+        return orjson.dumps(rec) + b"\n"
+    return (json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _extract_tags(rel: str) -> Tuple[str, Optional[bytes], Optional[str]]:
+    """
+    tagexport-Worker: (pfad, NDJSON-Zeile, None) oder (pfad, None, Fehlertext).
+    Liest nur den VORBIS_COMMENT-Block (Keys lowercase, Werte List[str]).
+    Kodiert bereits im Worker, der Elternprozess schreibt nur noch Bytes.
+    """
+    rel_path = Path(rel)
+    try:
+        tags = flac.read_vorbis_comments(rel_path)
+        line = _ndjson_line({"path": rel_path.as_posix(), "tags": tags})
+    except Exception as e:
+        return str(rel_path), None, str(e)
+    return str(rel_path), line, None
+
+
+def _ordered_parallel(fn: Callable, items: Iterable, workers: Optional[int] = None) -> Iterator:
+    """
+    fn(item) für alle items in einem Thread-Pool (die Arbeit steckt in
+    ffmpeg/ffprobe-Subprozessen), Ergebnisse in Eingabereihenfolge.
+    Höchstens 2×workers Aufgaben gleichzeitig in der Schwebe, damit ein
+    Walker-Generator nicht vorab komplett geleert wird. Beim ersten Fehler
+    werden noch nicht gestartete Aufgaben verworfen und der Fehler weitergereicht.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _plan_outputs(files: Iterable, cwd: str, out_root: Path) -> list:
+    """
+    (src, rel, dst) je Quelldatei; dst spiegelt rel unter out_root mit Endung .flac.
+    Quellen, die auf dasselbe Ziel fallen (z. B. 'x.mp3' und 'x.wav'), würden
+    parallel dieselbe Datei schreiben -> vorab abbrechen und alle Kollisionen melden.
+    """
+    fold = str.casefold if os.name == "nt" else str
+    plan = []
+    by_dst = defaultdict(list)
+    for src in files:
+        rel = Path(os.path.relpath(src, cwd))
+        dst = out_root / rel.with_suffix(".flac")
+        plan.append((src, rel, dst))
+        by_dst[fold(str(dst))].append(str(rel))
+    clashes = [srcs for srcs in by_dst.values() if len(srcs) > 1]
+    if clashes:
+        raise SystemExit(
+            "Mehrere Quellen ergeben dieselbe Zieldatei, Abbruch:\n  "
+            + "\n  ".join(" & ".join(srcs) for srcs in clashes))
+    return plan
 
 
 def main() -> None:
@@ -78,26 +157,32 @@ def main() -> None:
         out_root.mkdir(parents=True, exist_ok=True)
         exts = config.KNOWN_AUDIO_EXTENSIONS
 
-        files = find_audio_files(
-            ".", absolute=True, depth=args.depth, filter_ext=exts)
-        if not files:
-            raise SystemExit("keine passenden Dateien gefunden")
+        # Zielordner ausschließen, falls STAGE_ROOT unterhalb von '.' liegt.
+        files = iter_audio_files(
+            ".", absolute=True, depth=args.depth, filter_ext=exts, exclude_dirs=[out_root])
 
-        cwd = Path(".").resolve()
+        # Walker-Pfade liegen bereits unter der aufgelösten Wurzel ->
+        # relpath ist reine String-Arbeit, kein resolve()/stat je Datei.
+        # Plan vollständig vor dem Start: Zielkollisionen erkennen.
+        cwd = os.fspath(Path(".").resolve())
+        plan = _plan_outputs(files, cwd, out_root)
+        if not plan:
+            raise SystemExit("keine passenden Dateien gefunden")
         stats = {"ok": 0}
 
-        for src in files:
-            src_path = Path(src)
-            rel = src_path.resolve().relative_to(cwd)
-            print(f"[audio encode] {rel}")
-
+        def encode_one(job) -> Path:
+            src, rel, dst_path = job
             # Zielpfad: Struktur unterhalb '.' spiegeln, Endformat: .flac
-            dst_rel = rel.with_suffix(".flac")
-            dst_path = out_root / dst_rel
-            dst_path.parent.mkdir(parents=True, exist_ok=True)
+            # (Elternordner legt flac.encode an); Fehler mit Quellpfad weiterreichen
+            try:
+                flac.encode(Path(src), dst_path, rel_source_path=str(rel))
+            except Exception as e:
+                raise RuntimeError(f"[audio encode] {rel}: {e}") from e
+            return rel
 
-            # encode bricht bei Fehlern selbst ab
-            flac.encode(src_path, dst_path, rel_source_path=str(rel))
+        # Dateien parallel verarbeiten, Ausgabe in Dateireihenfolge
+        for rel in _ordered_parallel(encode_one, plan):
+            print(f"[audio encode] {rel}")
             stats["ok"] += 1
 
         print(f"[audio encode] fertig: ok={stats['ok']}")
@@ -107,12 +192,12 @@ def main() -> None:
         out_root.mkdir(parents=True, exist_ok=True)
 
         exts = {".flac"}
-        files = find_audio_files(
-            ".", absolute=True, depth=args.depth, filter_ext=exts)
-        if not files:
+        files = iter_audio_files(
+            ".", absolute=True, depth=args.depth, filter_ext=exts, exclude_dirs=[out_root])
+        cwd = os.fspath(Path(".").resolve())
+        plan = _plan_outputs(files, cwd, out_root)
+        if not plan:
             raise SystemExit("keine .flac-Dateien gefunden")
-
-        cwd = Path(".").resolve()
         stats = {"ok": 0}
 
         # Optional: Non-FLACs spiegeln (Windows, Robocopy)
@@ -124,16 +209,16 @@ def main() -> None:
             except Exception as e:
                 print(f"[mirror][WARN] {e}")
 
-        for src in files:
-            src_path = Path(src)
-            rel = src_path.resolve().relative_to(cwd)
-            print(f"[audio-remux] {rel}")
-
-            dst_rel = rel.with_suffix(".flac")
-            dst_path = out_root / dst_rel
-            dst_path.parent.mkdir(parents=True, exist_ok=True)
+        def remux_one(job) -> Path:
+            src, rel, dst_path = job
+            try:
+                flac.remux(Path(src), dst_path, rel_source_path=str(rel))
+            except Exception as e:
+                raise RuntimeError(f"[audio-remux] {rel}: {e}") from e
+            return rel
 
-            flac.remux(src_path, dst_path, rel_source_path=str(rel))
+        for rel in _ordered_parallel(remux_one, plan):
+            print(f"[audio-remux] {rel}")
             stats["ok"] += 1
 
         print(f"[remux] fertig: ok={stats['ok']}")
@@ -159,32 +244,44 @@ def main() -> None:
         # Preflight
         print(f"[finalize] Preflight-Check für {len(files)} Dateien ...")
 
-        lufs_map = {}
-        hash_map = {}
+        problems = []
+        files_by_hash = defaultdict(list)
+        mx_hash_by_file = {}
 
-        for f in files:
-            tags = flac.get_tags(f, ["MX-LUFS", "MX-HASH"])
+        # Tags parallel lesen (unabhängige Dateizugriffe), Prüfung danach
+        # seriell in Dateireihenfolge -> deterministische Fehlermeldungen
+        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2) as pool:
+            preflight = list(pool.map(
+                lambda f: flac.get_tags(f, ["MX-LUFS", "MX-HASH"]), files))
+
+        # Alle Befunde sammeln und gemeinsam melden (kein Abbruch beim ersten)
+        for f, tags in zip(files, preflight):
             mx_lufs = tags.get("MX-LUFS")
-            mx_hash = tags.get("MX-HASH")
+            mx_hash = (tags.get("MX-HASH") or "").strip()
 
             if not mx_lufs:
-                raise RuntimeError(f"MX-LUFS fehlt in: {f}")
+                problems.append(f"MX-LUFS fehlt in: {f}")
+            else:
+                try:
+                    float(mx_lufs)
+                except Exception:
+                    problems.append(f"MX-LUFS ungültig in: {f} (wert={mx_lufs})")
             if not mx_hash:
-                raise RuntimeError(f"MX-HASH fehlt in: {f}")
+                problems.append(f"MX-HASH fehlt in: {f}")
+                continue
 
-            try:
-                float(mx_lufs)
-            except Exception:
-                raise RuntimeError(
-                    f"MX-LUFS ungültig in: {f} (wert={mx_lufs})")
+            files_by_hash[mx_hash].append(f)
+            mx_hash_by_file[f] = mx_hash
 
-            if mx_hash in hash_map:
-                raise RuntimeError(
-                    f"Doppelter MX-HASH {mx_hash} in {f} und {hash_map[mx_hash]}"
-                )
+        for mx_hash, dup_files in files_by_hash.items():
+            if len(dup_files) > 1:
+                problems.append(
+                    f"Doppelter MX-HASH {mx_hash} in: {', '.join(map(str, dup_files))}")
 
-            lufs_map[f] = float(mx_lufs)
-            hash_map[mx_hash] = f
+        if problems:
+            raise RuntimeError(
+                f"Preflight fehlgeschlagen ({len(problems)} Befund(e)):\n  "
+                + "\n  ".join(problems))
 
         # Zielordner erzeugen
         out_root = Path(config.STAGE_ROOT) / \
@@ -192,13 +289,16 @@ def main() -> None:
         out_root.mkdir(parents=True, exist_ok=True)
         print(f"[finalize] Output-Ordner: {out_root}")
 
-        # Verarbeitung
-        for f in files:
-            mx_hash = flac.get_tags(f, ["MX-HASH"])["MX-HASH"].strip()
-            out_path = out_root / f"{mx_hash}.flac"
+        # Verarbeitung (parallel; Zielnamen sind per Preflight eindeutig)
+        def finalize_one(f):
+            out_path = out_root / f"{mx_hash_by_file[f]}.flac"
+            try:
+                return f, out_path, flac.finalize(src_path=f, out_path=out_path)
+            except Exception as e:
+                raise RuntimeError(f"[finalize] {f}: {e}") from e
 
+        for f, out_path, info in _ordered_parallel(finalize_one, files):
             print(f"[finalize] {f} → {out_path}")
-            info = flac.finalize(src_path=f, out_path=out_path)
 
             # Laufzeit-Feedback
             gain_db = info["actions"]["gain_db"]
@@ -212,56 +312,41 @@ def main() -> None:
         print("[finalize] abgeschlossen.")
 
     elif args.command == "tagexport":
-        import json
-        from mutagen.flac import FLAC
-
         # 1) Zieldatei vorbereiten
         out_path = Path(f"./audio-tagexport-{get_timestamp()}.ndjson")
         print(f"[tagexport] schreibe nach {out_path}")
 
         # 2) FLAC-Dateien rekursiv (relativ) sammeln
-        files = find_audio_files(".", absolute=False, filter_ext=[".flac"])
-        if not files:
+        files = iter_audio_files(".", absolute=False, filter_ext=[".flac"])
+        first = next(files, None)
+        if first is None:
             print("[tagexport] keine .flac-Dateien gefunden")
             raise SystemExit(0)
+        files = itertools.chain([first], files)
 
         written = 0
         skipped = 0
 
-        with out_path.open("w", encoding="utf-8", newline="\n") as out_f:
-            for rel in files:
-                rel_path = Path(rel)
-                try:
-                    # 3) Tags via mutagen lesen (roh, ohne eigenes Wrapper-API)
-                    audio = FLAC(str(rel_path))
-                    # mutagen liefert dict(tag -> list[str]); wir normalisieren Keys auf lowercase
-                    # und erzwingen List[str]-Werte
-                    raw = dict(audio)
-                    tags = {}
-                    for k, v in raw.items():
-                        key = str(k).lower()
-                        if isinstance(v, (list, tuple)):
-                            vals = [str(x) for x in v if x is not None]
-                        elif v is None:
-                            vals = []
-                        else:
-                            vals = [str(v)]
-                        tags[key] = vals
-
-                    # 4) NDJSON-Zeile schreiben
-                    rec = {"path": rel_path.as_posix(), "tags": tags}
-                    out_f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                    written += 1
-
-                    # optional: leichtes Laufzeitfeedback
-                    if written % 100 == 0:
-                        print(f"[tagexport] {written} geschrieben …")
-
-                except Exception as e:
-                    print(f"[tagexport][WARN] überspringe {rel_path}: {e}")
+        # 3) Tags parallel lesen (je Datei unabhängig); imap konsumiert den
+        #    Walker-Generator direkt und hält dessen Reihenfolge
+        ctx = mp.get_context("spawn")
+        # 1 MiB Puffer: wenige große write-Syscalls statt einem je paar Zeilen
+        with out_path.open("wb", buffering=1 << 20) as out_f, \
+                ctx.Pool(mp.cpu_count()) as pool:
+            for rel, line, err in pool.imap(_extract_tags, files, chunksize=64):
+                if err is not None:
+                    print(f"[tagexport][WARN] überspringe {rel}: {err}")
                     skipped += 1
                     continue
 
+                # 4) NDJSON-Zeile schreiben
+                out_f.write(line)
+                written += 1
+
+                # optional: leichtes Laufzeitfeedback
+                if written % 100 == 0:
+                    print(f"[tagexport] {written} geschrieben …")
+
         print(
             f"[tagexport] fertig: {written} Datei(en) exportiert, {skipped} übersprungen")
 
@@ -294,9 +379,10 @@ def main() -> None:
             if not dups:
                 print("[count]   keine Dubletten gefunden")
             else:
-                for name in sorted(dups.keys()):
+                # bereits nach Namen sortiert (collect_audio_stats)
+                for name, dup_paths in dups.items():
                     print(f'  "{name}" in:')
-                    for p in dups[name]:
+                    for p in dup_paths:
                         print(f"    {p}")
             return
 
@@ -317,9 +403,9 @@ def main() -> None:
         dups = stats.get("duplicates", {})
         print(f"\n[count] Dubletten-Gruppen: {len(dups)}")
         if dups:
-            for name in sorted(dups.keys()):
+            for name, dup_paths in dups.items():
                 print(f'  "{name}" in:')
-                for p in dups[name]:
+                for p in dup_paths:
                     print(f"    {p}")
 
         print()
@@ -15,15 +15,24 @@ def fp_ints_from_file(path: str) -> np.ndarray:
     m = re.search(r"FINGERPRINT=([\d,\s-]+)", res.stdout)
     if not m:
         raise SystemExit("❌ Keine FINGERPRINT-Zeile gefunden.")
-    # Zahlen einlesen und modulo 2^32 mappen → dann int32 interpretieren
-    nums = [int(x) % (2**32) for x in m.group(1).split(",") if x.strip()]
-    arr = np.array(nums, dtype=np.uint32).view(np.int32)
+    # Zahlen direkt in NumPy parsen (int64 fasst signierte wie unsignierte
+    # fpcalc-Ausgabe), Cast nach uint32 = modulo 2^32 → dann int32 interpretieren
+    raw = m.group(1).strip().strip(",")
+    if not raw:
+        return np.empty(0, dtype=np.int32)
+    arr = np.fromstring(raw, dtype=np.int64, sep=",").astype(np.uint32).view(np.int32)
     return arr
 
+# Bits je Byte – Fallback für NumPy < 2.0 (ohne np.bitwise_count)
+_POPCNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
 def hamming_distance(a: np.ndarray, b: np.ndarray) -> int:
     n = min(len(a), len(b))
-    xor = np.bitwise_xor(a[:n], b[:n])
-    return np.unpackbits(xor.view(np.uint8)).sum()
+    xor = np.bitwise_xor(a[:n].view(np.uint32), b[:n].view(np.uint32))
+    if hasattr(np, "bitwise_count"):
+        # POPCNT je 32-Bit-Wort statt 8× größerem unpackbits-Zwischenarray
+        return int(np.bitwise_count(xor).sum(dtype=np.int64))
+    return int(_POPCNT8[xor.view(np.uint8)].sum(dtype=np.int64))
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -5,12 +5,14 @@ desktop_ini_tool.py
 -------------------
 Rekursiv ab aktuellem Ordner:
   • nicht-versteckte Ordner verarbeiten (Startordner selbst wird NICHT verarbeitet)
-  • vorhandene desktop.ini löschen
-  • neue desktop.ini schreiben mit IconResource = (..\\ * depth) + "icons\\<Ordnername>.ico,0"
+  • desktop.ini an Ort und Stelle überschreiben (kein vorheriges Löschen)
+    mit IconResource = (..\\ * depth) + "icons\\<Ordnername>.ico,0"
   • desktop.ini auf Hidden+System setzen, Ordner auf ReadOnly setzen
+  • --atomic: desktop.ini über Temp-Datei + replace schreiben statt direkt
 """
 
 from __future__ import annotations
+import argparse
 import os
 import sys
 import platform
@@ -18,7 +20,7 @@ from pathlib import Path
 import ctypes
 from ctypes import wintypes
 import tempfile
-from typing import List
+from typing import List, Tuple
 
 IS_WINDOWS = platform.system().lower() == "windows"
 
@@ -76,50 +78,37 @@ def remove_attrs(path: Path, flags: int) -> None:
     set_attrs(path, current & ~flags)
 
 
-def is_hidden_dir(path: Path) -> bool:
-    name = path.name
+def is_hidden_dir(entry: os.DirEntry) -> bool:
+    name = entry.name
     if name in (".", ""):
         return False
     # dot-folders immer ignorieren
     if name.startswith("."):
         return True
     if IS_WINDOWS:
-        attrs = get_attrs(path)
-        if attrs != 0xFFFFFFFF and (attrs & (FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_SYSTEM)):
+        # Attribute stammen aus der Verzeichnisauflistung (FindFirstFile/-NextFile),
+        # stat(follow_symlinks=False) ist unter Windows ohne weiteren Syscall gecacht
+        attrs = entry.stat(follow_symlinks=False).st_file_attributes
+        if attrs & (FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_SYSTEM):
             return True
     return False
 
 
-def is_icons_dir(path: Path) -> bool:
-    return path.name.lower() == "icons"
+def is_icons_dir(name: str) -> bool:
+    return name.lower() == "icons"
 
 
-def compute_iconresource(start_dir: Path, folder: Path) -> str:
+def compute_iconresource(folder: Path, depth: int) -> str:
     """
     IconResource = '..\\' * depth + 'icons\\' + '<FolderName>.ico,0'
-    depth = Ebenen von start_dir zu folder (start_dir selbst => depth=0)
+    depth = Ebenen von start_dir zu folder (start_dir selbst => depth=0);
+    kommt direkt aus walk_non_hidden, keine Pfadrechnung je Ordner
     """
-    rel = os.path.relpath(folder, start_dir)  # '.' oder 'A\\B'
-    depth = 0 if rel == "." else len(Path(rel).parts)
     prefix = "..\\" * depth            # << korrigiert: kein +1 mehr
     return f"{prefix}icons\\{folder.name}.ico,0"
 
 
-def delete_existing_desktop_ini(folder: Path) -> None:
-    ini = folder / "desktop.ini"
-    if ini.exists():
-        if IS_WINDOWS:
-            # ggf. Hidden/System/Readonly entfernen
-            set_attrs(ini, FILE_ATTRIBUTE_NORMAL)
-        try:
-            ini.unlink()
-        except Exception:
-            if IS_WINDOWS:
-                set_attrs(ini, FILE_ATTRIBUTE_NORMAL)
-            ini.unlink()
-
-
-def write_desktop_ini(folder: Path, iconresource: str) -> None:
+def write_desktop_ini(folder: Path, iconresource: str, atomic: bool = False) -> None:
     ini = folder / "desktop.ini"
     content = (
         "[.ShellClassInfo]\n"
@@ -128,55 +117,65 @@ def write_desktop_ini(folder: Path, iconresource: str) -> None:
         "FolderType=Music\n"
     )
 
-    # atomar schreiben
-    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=str(folder), delete=False) as tf:
-        tmp_path = Path(tf.name)
-        tf.write(content)
-
-    if ini.exists():
-        if IS_WINDOWS:
-            set_attrs(ini, FILE_ATTRIBUTE_NORMAL)
-        ini.unlink(missing_ok=True)
-
-    tmp_path.replace(ini)
+    # Attribute am Ziel zurücksetzen, damit Schreiben/replace nicht an
+    # Hidden/System scheitert (fehlt die Datei, ist das ein No-op)
+    if IS_WINDOWS:
+        set_attrs(ini, FILE_ATTRIBUTE_NORMAL)
+
+    if atomic:
+        # atomar: Temp-Datei im Ordner + replace, nie eine halb geschriebene desktop.ini
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=str(folder), delete=False) as tf:
+            tmp_path = Path(tf.name)
+            tf.write(content)
+        tmp_path.replace(ini)
+    else:
+        # Standard: direkt schreiben (wenige Bytes; Explorer liest bei Bedarf neu)
+        with open(ini, "w", encoding="utf-8") as f:
+            f.write(content)
 
     if IS_WINDOWS:
         set_attrs(ini, FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_SYSTEM)
         add_attrs(folder, FILE_ATTRIBUTE_READONLY)
 
 
-def walk_non_hidden(start_dir: Path) -> List[Path]:
+def walk_non_hidden(start_dir: Path) -> List[Tuple[Path, int]]:
     """
-    os.walk ab start_dir, aber:
+    Rekursiv per os.scandir ab start_dir (Reihenfolge wie os.walk top-down),
+    liefert (Ordner, Tiefe relativ zu start_dir; direkte Unterordner = 1), aber:
       - versteckte Ordner (Hidden/System/dot) nicht traversieren
       - 'icons' überspringen
       - den Startordner NICHT in die Ergebnisliste aufnehmen
+      - Symlinks auf Ordner nicht verfolgen (wie os.walk)
     """
-    result: List[Path] = []
-    for root, dirs, _files in os.walk(start_dir):
-        root_path = Path(root)
-
-        # Subdirs filtern (IN-PLACE)
-        keep = []
-        for d in dirs:
-            p = root_path / d
-            if is_icons_dir(p) or is_hidden_dir(p):
-                continue
-            keep.append(d)
-        dirs[:] = keep
-
-        # Startordner NICHT aufnehmen
-        if root_path == start_dir:
-            continue
-        # sonstigen versteckten/icons-Ordner nicht aufnehmen
-        if is_icons_dir(root_path) or is_hidden_dir(root_path):
-            continue
-
-        result.append(root_path)
+    result: List[Tuple[Path, int]] = []
+
+    def walk(dir_path: str, depth: int) -> None:
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            return  # wie os.walk: unlesbare Ordner still überspringen
+        with it:
+            subdirs = [e for e in it
+                       if e.is_dir() and not e.is_symlink()
+                       and not is_icons_dir(e.name) and not is_hidden_dir(e)]
+        for e in subdirs:
+            result.append((Path(e.path), depth))
+            walk(e.path, depth + 1)
+
+    walk(os.fspath(start_dir), 1)
     return result
 
 
-def main() -> int:
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="desktop.ini für alle nicht-versteckten Unterordner neu schreiben.")
+    p.add_argument("--atomic", action="store_true",
+                   help="desktop.ini über Temp-Datei + replace schreiben (langsamer, dafür nie halb geschrieben).")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
     start_dir = Path.cwd()
     print(f"[INFO] Start: {start_dir}")
     if not start_dir.is_dir():
@@ -188,11 +187,10 @@ def main() -> int:
 
     ok = 0
     fail = 0
-    for folder in folders:
+    for folder, depth in folders:
         try:
-            iconresource = compute_iconresource(start_dir, folder)
-            delete_existing_desktop_ini(folder)
-            write_desktop_ini(folder, iconresource)
+            iconresource = compute_iconresource(folder, depth)
+            write_desktop_ini(folder, iconresource, atomic=args.atomic)
             ok += 1
             rel = folder.relative_to(start_dir)
             print(f"[OK]  {rel}\\desktop.ini → IconResource={iconresource}")
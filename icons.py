@@ -139,8 +139,11 @@ def main() -> int:
     print(f"[INFO] Verwende ImageMagick-Binärdatei: {im_bin}")
 
     # PNGs im aktuellen Ordner einsammeln (case-insensitive, nicht rekursiv)
-    pngs = sorted([p for p in cwd.iterdir() if p.is_file()
-                  and p.suffix.lower() == ".png"])
+    # scandir: Dateityp kommt aus dem Verzeichniseintrag (kein stat je Datei),
+    # Path-Objekte nur für Treffer
+    with os.scandir(cwd) as it:
+        pngs = sorted(Path(e.path) for e in it
+                      if e.name.lower().endswith(".png") and e.is_file())
     if not pngs:
         print("[INFO] Keine PNG-Dateien im aktuellen Ordner gefunden. Nichts zu tun.")
         # icons-Ordner auch nicht anlegen, wenn es nichts zu tun gibt.
@@ -182,9 +185,7 @@ def main() -> int:
                 args_ico = im_ico_command(frame_paths, dst_tmp)
                 run_im(im_bin, args_ico)
 
-                # Atomar verschieben/ersetzen
-                if dst_final.exists():
-                    dst_final.unlink()
+                # Atomar verschieben/ersetzen (os.replace überschreibt auch unter Windows)
                 dst_tmp.replace(dst_final)
 
                 ok += 1
@@ -194,24 +195,15 @@ def main() -> int:
                 fail += 1
                 print(f"[FAIL] {src_png.name}: {e}", file=sys.stderr)
             finally:
-                # Frames aufräumen
+                # Frames aufräumen (ohne exists()-Vorabprüfung)
                 for f in frame_paths:
                     try:
-                        if f.exists():
-                            f.unlink()
-                    except Exception:
+                        os.unlink(f)
+                    except OSError:
                         pass
     finally:
-        # tmp_root aufräumen
-        try:
-            for child in tmp_root.iterdir():
-                try:
-                    child.unlink()
-                except Exception:
-                    pass
-            tmp_root.rmdir()
-        except Exception:
-            pass
+        # tmp_root samt Restinhalt aufräumen
+        shutil.rmtree(tmp_root, ignore_errors=True)
 
     print(f"\n[SUMMARY] Erfolgreich: {ok}  |  Fehlgeschlagen: {fail}")
     return 0 if fail == 0 else 1
@@ -16,6 +16,12 @@ import sys
 import shutil
 import yaml
 
+try:
+    # libyaml-Binding (C), falls PyYAML damit gebaut wurde; sonst reiner Python-Loader
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # --- Externe Abhängigkeiten: HARTE Prüfung beim Import ---
 _HAS_FFMPEG = shutil.which("ffmpeg") is not None
 _HAS_FFPROBE = shutil.which("ffprobe") is not None
@@ -42,7 +48,7 @@ def _expand_path(path):
 
 
 with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    cfg = yaml.safe_load(f)
+    cfg = yaml.load(f, Loader=_YamlLoader)
 
 # --- Allgemeine Konfigurationswerte aus YAML ---
 LIBRARY_ROOT = _expand_path(cfg["library_root"])
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import json
+import os
+import struct
 import subprocess
 from mutagen.flac import FLAC
 from lib import config
@@ -15,6 +17,8 @@ __all__ = [
     "set_tags",
     "get_tags",
     "touch_comment_tag",
+    "first_picture_index",
+    "read_vorbis_comments",
     "encode",
 ]
 
@@ -47,6 +51,82 @@ def touch_comment_tag(flac_path: Path) -> None:
         del flac_file["description"]
         flac_file.save()
 
+
+def first_picture_index(audio: FLAC) -> Optional[int]:
+    """
+    Index des ersten eingebetteten Bildes relativ zu den Video-Streams
+    (passend zu ffmpeg '-map N:v:<idx>'); None, wenn keins vorhanden.
+    Nutzt das bereits geladene FLAC-Objekt – kein ffprobe-Subprozess.
+    """
+    # ffmpeg legt jeden PICTURE-Block als eigenen Video-Stream an (gleiche Reihenfolge)
+    return 0 if audio.pictures else None
+
+
+_FLAC_BLOCK_VORBIS_COMMENT = 4
+
+
+def read_vorbis_comments(flac_path: Path) -> Dict[str, List[str]]:
+    """
+    Liest NUR den VORBIS_COMMENT-Block einer FLAC-Datei -> {key(lower): [werte]}.
+    Alle anderen Metadatenblöcke (v. a. PICTURE) werden per seek übersprungen,
+    statt sie wie mutagen komplett einzulesen. Einträge ohne '=' werden ignoriert.
+    Kein gültiger FLAC-Header -> ValueError.
+    """
+    tags: Dict[str, List[str]] = {}
+    with open(flac_path, "rb") as fh:
+        head = fh.read(10)
+        if head[:3] == b"ID3":
+            # vorangestellten ID3v2-Tag überspringen (Größe syncsafe, 4x7 Bit)
+            size = 0
+            for b in head[6:10]:
+                size = (size << 7) | (b & 0x7F)
+            fh.seek(10 + size)
+            head = fh.read(4)
+        if head[:4] != b"fLaC":
+            raise ValueError(f"keine FLAC-Datei: {flac_path}")
+        fh.seek(fh.tell() - len(head) + 4)
+
+        while True:
+            hdr = fh.read(4)
+            if len(hdr) < 4:
+                break
+            last = hdr[0] & 0x80
+            length = int.from_bytes(hdr[1:4], "big")
+            if hdr[0] & 0x7F != _FLAC_BLOCK_VORBIS_COMMENT:
+                if last:
+                    break
+                fh.seek(length, 1)
+                continue
+
+            data = fh.read(length)
+            (vendor_len,) = struct.unpack_from("<I", data, 0)
+            pos = 4 + vendor_len
+            (count,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            for _ in range(count):
+                (n,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                key, sep, value = data[pos:pos + n].decode(
+                    "utf-8", errors="replace").partition("=")
+                pos += n
+                if sep:
+                    tags.setdefault(key.lower(), []).append(value)
+            break
+    return tags
+
+
+# Bereits angelegte Zielordner (Prozess-lokal): bei Batch-Läufen teilen sich
+# viele Dateien denselben Ordner -> makedirs nur beim ersten Mal
+_made_dirs: set[str] = set()
+
+
+def _ensure_parent(out_path: Path) -> None:
+    d = os.fspath(out_path.parent)
+    if d not in _made_dirs:
+        os.makedirs(d, exist_ok=True)
+        _made_dirs.add(d)
+
+
 # ---------- ffmpeg/ffprobe helpers (keine try/except; Exit bei Fehler) ----------
 
 
@@ -141,7 +221,7 @@ def encode(
     """
     src_path = Path(src_path)
     out_path = Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(out_path)
 
     # 1) Probe & Erkennung
     info = _ffprobe_json(src_path)
@@ -321,7 +401,7 @@ def remux(
     """
     src_path = Path(src_path)
     out_path = Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(out_path)
 
     # 0) Validierung: Quelle muss FLAC mit Audio-Stream sein
     info = _ffprobe_json(src_path)
@@ -422,12 +502,19 @@ def finalize(
 
     src_path = Path(src_path)
     out_path = Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_parent(out_path)
 
-    # --- Pflicht-Tags lesen & validieren ---
-    tags_req = get_tags(src_path, ["MX-HASH", "MX-LUFS"])
-    mx_hash = (tags_req.get("MX-HASH") or "").strip()
-    mx_lufs_raw = (tags_req.get("MX-LUFS") or "").strip()
+    # --- Tags einmalig lesen (Pflicht-Tags + Quellen der Umschiffungen) ---
+    src_tags = get_tags(src_path, [
+        "mx-hash", "mx-lufs",
+        "title", "subtitle", "artist", "date",
+        "mx-energy", "mx-genre", "mx-mood",
+        "description", "mx-tech", "mx-set",
+    ])
+
+    # --- Pflicht-Tags validieren ---
+    mx_hash = (src_tags.get("mx-hash") or "").strip()
+    mx_lufs_raw = (src_tags.get("mx-lufs") or "").strip()
     if not mx_hash:
         raise RuntimeError(f"MX-HASH fehlt in: {src_path}")
     try:
@@ -450,14 +537,7 @@ def finalize(
         "-y", str(out_path),
     ])
 
-    # --- Tag-Umschiffungen / Kopien ---
-    # gezielt nur benötigte Tags holen (einzelne Werte, kein List-Wrapper)
-    src_tags = get_tags(src_path, [
-        "title", "subtitle", "artist", "date",
-        "mx-energy", "mx-genre", "mx-mood",
-        "description", "mx-tech", "mx-set",
-    ])
-
+    # --- Tag-Umschiffungen / Kopien (aus src_tags, kein zweites Einlesen) ---
     title_base = (src_tags.get("title") or "").strip()
     subtitle = (src_tags.get("subtitle") or "").strip()
     artist_base = (src_tags.get("artist") or "").strip()
@@ -3,7 +3,8 @@
 import os
 import re
 import subprocess
-from typing import Optional
+from collections import Counter
+from typing import Iterable, Iterator, Optional
 from pathlib import Path
 from datetime import datetime
 from lib.config import AUDIO_EXTENSIONS
@@ -39,27 +40,59 @@ def make_filename(
     return Path(name)
 
 
-def find_audio_files(root, absolute: bool = False, depth: Optional[int] = None, filter_ext=None):
+def iter_audio_files(root, absolute: bool = False, depth: Optional[int] = None, filter_ext=None,
+                     exclude_dirs: Optional[Iterable] = None) -> Iterator[Path]:
     """
-    Gibt eine LISTE aller Audiodateien (Snapshot) unterhalb von root zurück.
+    Liefert Audiodateien unterhalb von root als GENERATOR (Streaming, kein Snapshot).
     - Standard: RELATIVE Pfade (absolute=False)
     - depth: maximale Verzeichnistiefe (None = unbegrenzt)
     - filter_ext: Liste erlaubter Endungen (z. B. [".flac", ".mp3"]), sonst AUDIO_EXTENSIONS
+    - exclude_dirs: Ordner, die nicht betreten werden (z. B. ein Zielordner unterhalb
+      von root, in den während der Iteration geschrieben wird)
+    Pfade werden per String-Join aus der (einmal aufgelösten) Wurzel gebildet.
     """
     root = Path(root).resolve()
-    root_depth = len(root.parts)
     filter_set = set(ext.lower() for ext in (filter_ext or AUDIO_EXTENSIONS))
+    excluded = {os.path.normcase(str(Path(d).resolve())) for d in (exclude_dirs or ())}
+
+    def walk(dir_abs: str, dir_rel: str, curr_depth: int):
+        try:
+            it = os.scandir(dir_abs)
+        except OSError:
+            return  # wie os.walk: unlesbare Ordner still überspringen
+        subdirs = []
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # wie os.walk: Symlinks auf Ordner nicht verfolgen
+                    if not entry.is_symlink():
+                        subdirs.append(entry)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() in filter_set:
+                    yield Path(entry.path if absolute else os.path.join(dir_rel, entry.name))
+        if depth is not None and curr_depth >= depth:
+            return
+        for entry in subdirs:
+            if excluded and os.path.normcase(entry.path) in excluded:
+                continue
+            yield from walk(entry.path, os.path.join(dir_rel, entry.name), curr_depth + 1)
 
-    results = []
-    for dirpath, _, filenames in os.walk(root):
-        curr_depth = len(Path(dirpath).parts) - root_depth
-        if depth is not None and curr_depth > depth:
-            continue
-        for name in filenames:
-            file = (Path(dirpath) / name).resolve()
-            if file.suffix.lower() in filter_set:
-                results.append(file if absolute else file.relative_to(root))
-    return results
+    yield from walk(str(root), "", 0)
+
+
+def find_audio_files(root, absolute: bool = False, depth: Optional[int] = None, filter_ext=None):
+    """
+    Gibt eine LISTE aller Audiodateien (Snapshot) unterhalb von root zurück.
+    - Standard: RELATIVE Pfade (absolute=False)
+    - depth: maximale Verzeichnistiefe (None = unbegrenzt)
+    - filter_ext: Liste erlaubter Endungen (z. B. [".flac", ".mp3"]), sonst AUDIO_EXTENSIONS
+    Für reine Durchläufe ohne Mehrfachzugriff: iter_audio_files().
+    """
+    return list(iter_audio_files(root, absolute=absolute, depth=depth, filter_ext=filter_ext))
 
 
 def loudness(file: Path) -> tuple[float | None, float | None]:
@@ -136,51 +169,52 @@ def collect_audio_stats(root=".", extensions=None, depth=None, absolute=False, a
     total = 0
     per_ext: dict[str, int] = {}
     per_folder: dict[str, int] = {}
-    name_map: dict[str, list[str]] = {}
-
-    root_depth = len(root.parts)
-    seen_dirs: set[Path] = set()
-
-    for dirpath, dirnames, filenames in os.walk(root):
-        curr_depth = len(Path(dirpath).parts) - root_depth
-        if depth is not None and curr_depth > depth:
-            dirnames[:] = []  # Abstieg stoppen
-            continue
-
-        dpath = Path(dirpath)
-        seen_dirs.add(dpath)
+    # Dubletten: erst nur (Name, Pfad) mitschreiben, Gruppen am Ende nur für
+    # mehrfach vorkommende Namen bilden -> keine N Einzel-Listen
+    stems: list[str] = []
+    paths: list[str] = []
+
+    root_str = str(root)
+    seen_keys: list[str] = []
+
+    # Ordnerschlüssel einmal je Ordner, Dateien nur per String-Operationen
+    # (kein Path-Objekt je Datei)
+    for dirpath, dirnames, filenames in os.walk(root_str):
+        rel_dir = os.path.relpath(dirpath, root_str)
+        if depth is not None:
+            curr_depth = 0 if rel_dir == "." else rel_dir.count(os.sep) + 1
+            if curr_depth >= depth:
+                dirnames[:] = []  # Abstieg stoppen, tiefere Ordner gar nicht erst listen
+
+        folder_key = dirpath if absolute else rel_dir
+        seen_keys.append(folder_key)
 
         for name in filenames:
-            p = dpath / name
-            suffix = p.suffix.lower()
+            stem, suffix = os.path.splitext(name)
+            suffix = suffix.lower()
             if suffix not in exts:
                 continue
 
             total += 1
             per_ext[suffix] = per_ext.get(suffix, 0) + 1
+            per_folder[folder_key] = per_folder.get(folder_key, 0) + 1
 
-            folder_key_path = p.parent
+            stems.append(stem.casefold())
             if absolute:
-                folder_key = str(folder_key_path)
+                paths.append(os.path.join(dirpath, name))
             else:
-                folder_key = str(folder_key_path.relative_to(
-                    root)) if folder_key_path != root else "."
-
-            per_folder[folder_key] = per_folder.get(folder_key, 0) + 1
-
-            stem_key = p.stem.casefold()
-            path_str = str(p) if absolute else str(p.relative_to(root))
-            name_map.setdefault(stem_key, []).append(path_str)
+                paths.append(name if rel_dir == "." else os.path.join(rel_dir, name))
 
     if all_folders:
-        for d in seen_dirs:
-            if absolute:
-                k = str(d)
-            else:
-                k = str(d.relative_to(root)) if d != root else "."
+        for k in seen_keys:
             per_folder.setdefault(k, 0)
 
-    duplicates = {k: v for k, v in name_map.items() if len(v) > 1}
+    dup_names = {n for n, c in Counter(stems).items() if c > 1}
+    duplicates: dict[str, list[str]] = {n: [] for n in dup_names}
+    if dup_names:
+        for stem_key, path_str in zip(stems, paths):
+            if stem_key in dup_names:
+                duplicates[stem_key].append(path_str)
 
     return {
         "total": total,